@@ -0,0 +1,62 @@
+"""
+The example_local.py demos served through the loopback gradio server and in process (direct=True).
+
+```sh
+PYTHONPATH=src python src/benchmarks/bench_direct.py --requests 100 --concurrency 8
+```
+"""
+from gradio2api.gr_fastapi import LocalGradioAppRouter
+from gradio2api.bench import drive
+from fastapi import FastAPI
+from PIL import Image
+import numpy as np
+import argparse
+import tempfile
+import asyncio
+import httpx
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import example_local # builds the loopback router, launching the demo
+
+async def run(args)->list[dict]:
+  image_path = os.path.join(tempfile.mkdtemp(prefix="gradio2api-bench-"), "input.png")
+  Image.fromarray(
+    np.random.randint(0, 255, (args.image_size, args.image_size, 3), dtype=np.uint8)
+  ).save(image_path)
+  payloads = {
+    "sepia": {"input_img": {"path": image_path}},
+    "generate_tone": {"note": "A", "octave": 4, "duration": 1},
+  }
+
+  app = FastAPI()
+  app.include_router(example_local.router, prefix="/loopback")
+  app.include_router(LocalGradioAppRouter(example_local.demo, direct=True), prefix="/direct")
+
+  results = []
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+    for api_name, payload in payloads.items():
+      for mode in ("loopback", "direct"):
+        async def send(client:httpx.AsyncClient)->httpx.Response:
+          return await client.post(f"/{mode}/{api_name}", json=payload)
+        await drive(client, send, args.warmup, 1)
+        result = await drive(client, send, args.requests, args.concurrency)
+        results.append({"api_name": api_name, "mode": mode, **result})
+        print("[BENCH]", api_name, mode, f"{result['throughput_rps']:.1f} rps", file=sys.stderr)
+  return results
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--requests", type=int, default=100)
+  parser.add_argument("--concurrency", type=int, default=8)
+  parser.add_argument("--warmup", type=int, default=3)
+  parser.add_argument("--image_size", type=int, default=256)
+  args = parser.parse_args()
+
+  print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+  main()
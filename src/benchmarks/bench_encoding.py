@@ -0,0 +1,70 @@
+"""
+Response encoders and compression on large Dataframe outputs.
+
+```sh
+python src/benchmarks/bench_encoding.py --rows 10000 100000 --n 5
+```
+"""
+from gradio2api.gr_application import LocalGradioApplication
+from gradio2api.encoding import EncodingConfig, encode, compress, orjson, msgpack, zstandard, JSON, MSGPACK
+from fastapi.encoders import jsonable_encoder
+import gradio as gr
+import argparse
+import time
+import json
+
+def build_demo(rows:int)->gr.Blocks:
+  table = {
+    "headers": ["id", "name", "score", "flag"],
+    "data": [[i, f"row {i}", i / 3, i % 2 == 0] for i in range(rows)],
+  }
+  with gr.Blocks() as demo:
+    gr.Button().click(lambda: table, None, gr.Dataframe(label="table"), api_name="table")
+  return demo
+
+def timeit(fn, n:int):
+  start = time.perf_counter()
+  for _ in range(n):
+    out = fn()
+  return (time.perf_counter() - start) / n * 1e3, out
+
+def bench_rows(rows:int, n:int)->dict:
+  application = LocalGradioApplication(build_demo(rows), direct=True)
+  api = application.apis["/table"]
+  output = api.normalize_output([api.client.predict(api_name="/table")])
+
+  encoders = {
+    # what a FastAPI route does with a returned model
+    "fastapi_jsonable_encoder": lambda: json.dumps(jsonable_encoder(output)).encode(),
+    "pydantic_dump_json": lambda: api.return_adapter.dump_json(output),
+  }
+  if orjson is not None:
+    encoders["orjson"] = lambda: encode(api.dump_output(output), JSON)
+  if msgpack is not None:
+    encoders["msgpack"] = lambda: encode(api.dump_output(output), MSGPACK)
+
+  report = {"rows": rows, "encoders": {}, "compression": {}}
+  for name, fn in encoders.items():
+    ms, body = timeit(fn, n)
+    report["encoders"][name] = {"ms": ms, "bytes": len(body)}
+
+  config = EncodingConfig()
+  body = encode(api.dump_output(output), JSON)
+  for coding in ["gzip"] + (["zstd"] if zstandard is not None else []):
+    ms, compressed = timeit(lambda: compress(body, coding, config), n)
+    report["compression"][coding] = {"ms": ms, "bytes": len(compressed), "ratio": len(body) / len(compressed)}
+  return report
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+  parser.add_argument("--n", type=int, default=5)
+  args = parser.parse_args()
+
+  print(json.dumps({
+    "installed": {"orjson": orjson is not None, "msgpack": msgpack is not None, "zstandard": zstandard is not None},
+    "results": [bench_rows(rows, args.n) for rows in args.rows],
+  }, indent=2))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,117 @@
+"""
+Per-request overhead of the generated pydantic models,
+and of each validation mode on a large Dataframe output.
+
+```sh
+python src/benchmarks/bench_models.py --n 2000 --rows 100000
+```
+"""
+from gradio2api.gr_application import LocalGradioApplication, MultipleFields
+from gradio2api.gr_fastapi import LocalGradioAppRouter
+from fastapi import FastAPI
+import gradio as gr
+import argparse
+import asyncio
+import httpx
+import time
+import json
+
+def echo(text, number, flag):
+  return text, number, flag
+
+def build_demo()->gr.Blocks:
+  with gr.Blocks() as demo:
+    text = gr.Textbox(label="text")
+    number = gr.Number(label="number")
+    flag = gr.Checkbox(label="flag")
+    out_text = gr.Textbox(label="out_text")
+    out_number = gr.Number(label="out_number")
+    out_flag = gr.Checkbox(label="out_flag")
+    gr.Button().click(
+      echo,
+      [text, number, flag],
+      [out_text, out_number, out_flag],
+      api_name="echo",
+    )
+  return demo
+
+def build_dataframe_demo(rows:int)->gr.Blocks:
+  table = {
+    "headers": ["id", "name", "score"],
+    "data": [[i, f"row {i}", i / 3] for i in range(rows)],
+  }
+  with gr.Blocks() as demo:
+    gr.Button().click(lambda: table, None, gr.Dataframe(label="table"), api_name="table")
+  return demo
+
+async def time_route(app:FastAPI, path:str, n:int)->float:
+  async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+    (await client.post(path, json={})).raise_for_status()
+    start = time.perf_counter()
+    for _ in range(n):
+      (await client.post(path, json={})).raise_for_status()
+    return (time.perf_counter() - start) / n
+
+def validation_modes(rows:int, n:int)->dict:
+  demo = build_dataframe_demo(rows)
+  app = FastAPI()
+  apis = {}
+  for mode in ("strict", "lax", "trusted"):
+    router = LocalGradioAppRouter(demo, validation=mode, direct=True)
+    app.include_router(router, prefix=f"/{mode}")
+    apis[mode] = router.gradio_application.apis["/table"]
+
+  gr_result = [apis["strict"].client.predict(api_name="/table")]
+  report = {"rows": rows}
+  for mode, api in apis.items():
+    report[f"{mode}_output_ms"] = timeit(
+      lambda: api.dump_output_json(api.normalize_output(gr_result)), n,
+    ) * 1e3
+    report[f"{mode}_route_ms"] = asyncio.run(time_route(app, f"/{mode}/table", n)) * 1e3
+  return report
+
+def rebuild_per_call(api, item, gr_result):
+  # the behaviour before models were cached on GradioAPI
+  parameter_model = MultipleFields(api.parameters).to_pydantic_model(f"{api.normalized_api_name}_parameter")
+  return_model = MultipleFields(api.returns).to_pydantic_model(f"{api.normalized_api_name}_return")
+  parameter_model(**item)
+  return_model(**dict(zip(return_model.model_fields.keys(), gr_result)))
+
+def cached(api, item, gr_result):
+  api.normalize_input(item)
+  api.normalize_output(gr_result)
+
+def timeit(fn, n:int, *args)->float:
+  start = time.perf_counter()
+  for _ in range(n):
+    fn(*args)
+  return (time.perf_counter() - start) / n
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--n", type=int, default=1000)
+  parser.add_argument("--rows", type=int, default=100_000, help="Rows of the Dataframe output compared across validation modes.")
+  parser.add_argument("--n_rows", type=int, default=5, help="Calls per validation mode.")
+  args = parser.parse_args()
+
+  application = LocalGradioApplication(build_demo())
+  api = application.apis["/echo"]
+  item = {
+    field_name: value
+    for field_name, value in zip(api.parameter_model.model_fields.keys(), ["hello", 1.0, True])
+  }
+  gr_result = ["hello", 1.0, True]
+
+  before = timeit(rebuild_per_call, args.n, api, item, gr_result)
+  after = timeit(cached, args.n, api, item, gr_result)
+  print(json.dumps({
+    "n": args.n,
+    "rebuild_per_call_us": before * 1e6,
+    "cached_us": after * 1e6,
+    "speedup": before / after,
+    "validation_modes": validation_modes(args.rows, args.n_rows),
+  }, indent=2))
+  application.app.close()
+
+if __name__ == "__main__":
+  main()
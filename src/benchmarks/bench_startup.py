@@ -0,0 +1,59 @@
+"""
+Import time of gradio2api, checked against a budget.
+An API-only aggregator must never import the GUI stack.
+
+```sh
+python src/benchmarks/bench_startup.py --n 5 --budget_s 2.0
+```
+"""
+import subprocess
+import argparse
+import json
+import sys
+
+GUI_MODULES = ["gradio", "pandas", "numpy", "PIL"]
+
+PROBE = f"""
+import time, sys, json
+start = time.perf_counter()
+import gradio2api
+seconds = time.perf_counter() - start
+print(json.dumps({{
+  "seconds": seconds,
+  "gui_modules": [m for m in {GUI_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+def measure()->dict:
+  # a fresh interpreter every time, nothing is cached in sys.modules
+  output = subprocess.run(
+    [sys.executable, "-c", PROBE],
+    check=True,
+    capture_output=True,
+    text=True,
+  ).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--n", type=int, default=5)
+  parser.add_argument("--budget_s", type=float, default=2.0)
+  args = parser.parse_args()
+
+  runs = [measure() for _ in range(args.n)]
+  seconds = sorted(run["seconds"] for run in runs)
+  gui_modules = sorted({m for run in runs for m in run["gui_modules"]})
+  median = seconds[len(seconds) // 2]
+  report = {
+    "n": args.n,
+    "import_median_s": median,
+    "import_min_s": seconds[0],
+    "budget_s": args.budget_s,
+    "gui_modules_imported": gui_modules,
+    "ok": median <= args.budget_s and not gui_modules,
+  }
+  print(json.dumps(report, indent=2))
+  sys.exit(0 if report["ok"] else 1)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,181 @@
+from pydantic import BaseModel
+from typing import Optional
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import time
+
+class AdmissionConfig(BaseModel):
+  max_concurrency: Optional[int] = None # upstream calls in flight for the prefix
+  endpoint_max_concurrency: dict[str, int] = {} # api_name -> cap
+  max_queue: int = 128 # waiting calls beyond this are rejected with 429
+  queue_timeout: Optional[float] = None # seconds a call may wait before it is rejected
+  priority: int = 0 # higher prefixes are always served first
+  weight: float = 1.0 # share among prefixes of the same priority
+  endpoint_priority: dict[str, int] = {} # ordering inside the prefix queue
+
+class AdmissionStats(BaseModel):
+  in_flight: int = 0
+  queued: int = 0
+  admitted: int = 0
+  rejected: int = 0
+
+class AdmissionRejected(Exception):
+  def __init__(self, message:str, retry_after:float):
+    super().__init__(message)
+    self.retry_after = retry_after
+
+class _Ticket:
+  def __init__(self, api_name:str, priority:int, future:asyncio.Future):
+    self.api_name = api_name
+    self.priority = priority
+    self.future = future
+
+class PrefixAdmission:
+  prefix: str
+  config: AdmissionConfig
+  stats: AdmissionStats
+
+  def __init__(self, scheduler:"AdmissionScheduler", prefix:str, config:AdmissionConfig):
+    self.scheduler = scheduler
+    self.prefix = prefix
+    self.config = config
+    self.stats = AdmissionStats()
+    self.virtual_time = 0.0
+    self.ewma_latency = None
+    self.tickets: deque[_Ticket] = deque()
+    self.endpoint_in_flight: dict[str, int] = {}
+
+  def can_run(self, api_name:str)->bool:
+    if self.config.max_concurrency is not None and self.stats.in_flight >= self.config.max_concurrency:
+      return False
+    cap = self.config.endpoint_max_concurrency.get(api_name)
+    return cap is None or self.endpoint_in_flight.get(api_name, 0) < cap
+
+  def runnable(self)->_Ticket | None:
+    # the first waiting call whose endpoint has room, a full endpoint never blocks the others
+    for ticket in self.tickets:
+      if self.can_run(ticket.api_name):
+        return ticket
+    return None
+
+  def retry_after(self)->float:
+    slots = self.config.max_concurrency or self.scheduler.max_concurrency or 1
+    return max(1.0, math.ceil((self.ewma_latency or 1.0) * (len(self.tickets) + 1) / slots))
+
+  def would_wait(self, api_name:str)->bool:
+    return not (self.scheduler._has_room() and self.can_run(api_name) and self.runnable() is None)
+
+  def check(self, api_name:str):
+    # fail fast before a response starts streaming, a call that runs right away never queues
+    if len(self.tickets) >= self.config.max_queue and self.would_wait(api_name):
+      self.stats.rejected += 1
+      raise AdmissionRejected(f"{self.prefix} queue is full", self.retry_after())
+
+  @asynccontextmanager
+  async def slot(self, api_name:str):
+    await self.scheduler.acquire(self, api_name)
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      latency = time.perf_counter() - start
+      self.ewma_latency = latency if self.ewma_latency is None else self.ewma_latency + 0.3 * (latency - self.ewma_latency)
+      self.scheduler.release(self, api_name)
+
+# one scheduler per aggregator, everything runs on its event loop
+class AdmissionScheduler:
+  max_concurrency: int | None
+
+  def __init__(self, max_concurrency:int | None = None):
+    self.max_concurrency = max_concurrency # upstream calls in flight over every prefix
+    self.in_flight = 0
+    self.prefixes: dict[str, PrefixAdmission] = {}
+
+  def register(self, prefix:str, config:AdmissionConfig | None = None)->PrefixAdmission:
+    if prefix not in self.prefixes:
+      self.prefixes[prefix] = PrefixAdmission(self, prefix, config or AdmissionConfig())
+    elif config is not None:
+      self.prefixes[prefix].config = config
+    return self.prefixes[prefix]
+
+  def unregister(self, prefix:str):
+    admission = self.prefixes.pop(prefix, None)
+    if admission is None:
+      return
+    # calls in flight still release, waiting calls are turned away
+    while admission.tickets:
+      admission.tickets.popleft().future.set_exception(
+        AdmissionRejected(f"{prefix} was removed", admission.config.queue_timeout or 1.0)
+      )
+    admission.stats.queued = 0
+
+  def _has_room(self)->bool:
+    return self.max_concurrency is None or self.in_flight < self.max_concurrency
+
+  def _start(self, admission:PrefixAdmission, api_name:str):
+    self.in_flight += 1
+    admission.stats.in_flight += 1
+    admission.stats.admitted += 1
+    admission.endpoint_in_flight[api_name] = admission.endpoint_in_flight.get(api_name, 0) + 1
+    admission.virtual_time += 1 / admission.config.weight
+
+  async def acquire(self, admission:PrefixAdmission, api_name:str):
+    if not admission.would_wait(api_name):
+      self._start(admission, api_name)
+      return
+
+    admission.check(api_name)
+    backlogged = [a.virtual_time for a in self.prefixes.values() if a.tickets]
+    if not admission.tickets and backlogged:
+      # an idle prefix does not bank credit for later
+      admission.virtual_time = max(admission.virtual_time, min(backlogged))
+    priority = admission.config.endpoint_priority.get(api_name, 0)
+    ticket = _Ticket(api_name, priority, asyncio.get_running_loop().create_future())
+    # higher endpoint priority first, fifo otherwise
+    position = len(admission.tickets)
+    while position > 0 and admission.tickets[position - 1].priority < priority:
+      position -= 1
+    admission.tickets.insert(position, ticket)
+    admission.stats.queued = len(admission.tickets)
+
+    try:
+      await asyncio.wait_for(asyncio.shield(ticket.future), admission.config.queue_timeout)
+    except BaseException as e:
+      if ticket.future.done() and not ticket.future.cancelled() and ticket.future.exception() is None:
+        # admitted while giving up, hand the slot back
+        self.release(admission, api_name)
+      elif ticket in admission.tickets:
+        ticket.future.cancel()
+        admission.tickets.remove(ticket)
+        admission.stats.queued = len(admission.tickets)
+      if isinstance(e, asyncio.TimeoutError):
+        admission.stats.rejected += 1
+        raise AdmissionRejected(f"{admission.prefix} queue wait exceeded", admission.retry_after())
+      raise
+
+  def release(self, admission:PrefixAdmission, api_name:str):
+    self.in_flight -= 1
+    admission.stats.in_flight -= 1
+    admission.endpoint_in_flight[api_name] -= 1
+    self._dispatch()
+
+  def _dispatch(self):
+    while self._has_room():
+      # strict priority between prefixes, weighted fair (least virtual time) within a priority
+      candidates = [
+        (admission, ticket)
+        for admission in self.prefixes.values()
+        if (ticket := admission.runnable()) is not None
+      ]
+      if not candidates:
+        return
+      admission, ticket = min(
+        candidates,
+        key=lambda candidate: (-candidate[0].config.priority, candidate[0].virtual_time),
+      )
+      admission.tickets.remove(ticket)
+      admission.stats.queued = len(admission.tickets)
+      self._start(admission, ticket.api_name)
+      ticket.future.set_result(None)
@@ -0,0 +1,100 @@
+from pydantic import BaseModel
+from typing import Callable, Optional
+from concurrent.futures import Future, Executor
+import asyncio
+
+class BatchConfig(BaseModel):
+  max_batch_size: Optional[int] = None # default to the upstream max_batch_size
+  max_wait_ms: float = 10.0
+  api_names: Optional[list[str]] = None # default to every upstream function with batch=True
+
+class BatchStats(BaseModel):
+  queue_depth: int = 0
+  batches: int = 0
+  items: int = 0
+  batch_size_histogram: dict[int, int] = {}
+
+class MicroBatcher:
+  submit_fn: Callable[[dict], Future]
+  executor: Executor | None
+  max_batch_size: int
+  max_wait: float
+  stats: BatchStats
+
+  def __init__(
+      self,
+      submit_fn:Callable[[dict], Future],
+      max_batch_size:int,
+      max_wait:float,
+      executor:Executor | None = None, # blocking submits run here, never on the event loop
+    ):
+    self.submit_fn = submit_fn
+    self.executor = executor
+    self.max_batch_size = max(1, max_batch_size)
+    self.max_wait = max_wait
+    self.stats = BatchStats()
+    self.__pending: list[tuple[dict, asyncio.Future]] = []
+    self.__flush_handle = None
+
+  async def submit(self, item:dict):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    self.__pending.append((item, future))
+    self.stats.queue_depth = len(self.__pending)
+
+    if len(self.__pending) >= self.max_batch_size:
+      self._flush()
+    elif self.__flush_handle is None:
+      self.__flush_handle = loop.call_later(self.max_wait, self._flush)
+    return await future
+
+  def _flush(self):
+    if self.__flush_handle is not None:
+      self.__flush_handle.cancel()
+      self.__flush_handle = None
+
+    batch, self.__pending = self.__pending, []
+    self.stats.queue_depth = 0
+    self.stats.batches += 1
+    self.stats.items += len(batch)
+    self.stats.batch_size_histogram[len(batch)] = self.stats.batch_size_histogram.get(len(batch), 0) + 1
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(self.executor, self._submit_batch, loop, batch)
+
+  def _submit_batch(self, loop:asyncio.AbstractEventLoop, batch:list[tuple[dict, asyncio.Future]]):
+    # the whole batch reaches the upstream queue together, so its batch=True
+    # function picks the items up in one call
+    for item, future in batch:
+      if future.cancelled():
+        continue
+      try:
+        job = self.submit_fn(item)
+      except Exception as e:
+        loop.call_soon_threadsafe(_set_exception, future, e)
+        continue
+      job.add_done_callback(
+        lambda job, future=future: loop.call_soon_threadsafe(_copy_result, job, future)
+      )
+      loop.call_soon_threadsafe(_cancel_with, future, job)
+
+def _cancel_with(target:asyncio.Future, job:Future):
+  # a caller that gave up, e.g. on a timeout, drops its upstream job as well
+  if target.cancelled():
+    job.cancel()
+  elif not target.done():
+    target.add_done_callback(lambda target: target.cancelled() and job.cancel())
+
+def _set_exception(target:asyncio.Future, exc:BaseException):
+  if not target.done():
+    target.set_exception(exc)
+
+def _copy_result(source:Future, target:asyncio.Future):
+  if target.done():
+    return
+  if source.cancelled():
+    target.cancel()
+  elif (exc := source.exception()) is not None:
+    target.set_exception(exc)
+  else:
+    target.set_result(source.result())
@@ -0,0 +1,214 @@
+"""
+Load test gradio2api against local gr.Blocks fixtures.
+
+```sh
+gradio2api bench --requests 500 --concurrency 32 --output bench.json
+```
+"""
+from .gr_fastapi import LocalGradioAppRouter
+from .clients_aggregator import Aggregator, AppConfig
+from .batching import BatchConfig
+from .utils.memory import rss_bytes
+from fastapi import FastAPI
+from typing import Awaitable, Callable
+import gradio as gr
+import argparse
+import platform
+import tempfile
+import asyncio
+import httpx
+import time
+import json
+import sys
+import os
+
+FIXTURES = ("echo", "sleep", "large_file", "generator", "batched")
+MOUNTS = ("local", "direct", "aggregator")
+
+def build_fixture(name:str, sleep_ms:float, file_path:str)->gr.Blocks:
+  def echo(x):
+    return x
+
+  def sleep(x):
+    time.sleep(sleep_ms / 1000)
+    return x
+
+  def large_file(x):
+    return file_path
+
+  def generator(x):
+    for i in range(5):
+      yield x * (i + 1)
+
+  def batched(x):
+    return [[text.upper() for text in x]]
+
+  with gr.Blocks() as demo:
+    text = gr.Textbox(label="x")
+    button = gr.Button()
+    if name == "large_file":
+      button.click(large_file, text, gr.File(label="file"), api_name=name)
+    elif name == "batched":
+      button.click(batched, text, gr.Textbox(label="y"), api_name=name, batch=True, max_batch_size=8)
+    else:
+      fn = {"echo": echo, "sleep": sleep, "generator": generator}[name]
+      button.click(fn, text, gr.Textbox(label="y"), api_name=name)
+  demo.queue(default_concurrency_limit=None)
+  return demo
+
+def build_app(fixtures:list[str], mounts:list[str], sleep_ms:float, file_path:str)->FastAPI:
+  app = FastAPI()
+  configs = []
+  for name in fixtures:
+    batching = BatchConfig() if name == "batched" else None
+    router = LocalGradioAppRouter(build_fixture(name, sleep_ms, file_path), batching=batching)
+    if "local" in mounts:
+      app.include_router(router, prefix=f"/local/{name}")
+    if "direct" in mounts:
+      direct = LocalGradioAppRouter(build_fixture(name, sleep_ms, file_path), batching=batching, direct=True)
+      app.include_router(direct, prefix=f"/direct/{name}")
+    configs.append(AppConfig(
+      uri=router.gradio_application.app.local_url,
+      prefix=f"/aggregator/{name}",
+      batching=batching,
+    ))
+  if "aggregator" in mounts:
+    app.include_router(Aggregator(configs, gui_mode="none"))
+  return app
+
+def make_request(name:str, path:str)->Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]:
+  async def send(client:httpx.AsyncClient)->httpx.Response:
+    if name == "generator":
+      return await client.post(
+        f"{path}/{name}/stream",
+        json={"x": "a"},
+        headers={"accept": "application/x-ndjson"},
+      )
+    return await client.post(f"{path}/{name}", json={"x": "hello"})
+  return send
+
+def percentile_ms(latencies:list[float], q:float)->float | None:
+  if not latencies:
+    return None
+  latencies = sorted(latencies)
+  return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+async def drive(
+    client:httpx.AsyncClient,
+    send:Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    requests:int,
+    concurrency:int,
+  )->dict:
+  latencies = []
+  errors = 0
+  remaining = iter(range(requests))
+
+  async def worker():
+    nonlocal errors
+    for _ in remaining:
+      start = time.perf_counter()
+      try:
+        response = await send(client)
+        failed = response.status_code >= 400
+      except Exception:
+        failed = True
+      if failed:
+        errors += 1
+      else:
+        latencies.append(time.perf_counter() - start)
+
+  start = time.perf_counter()
+  await asyncio.gather(*(worker() for _ in range(concurrency)))
+  seconds = time.perf_counter() - start
+  return {
+    "requests": requests,
+    "concurrency": concurrency,
+    "errors": errors,
+    "seconds": seconds,
+    "throughput_rps": len(latencies) / seconds,
+    "p50_ms": percentile_ms(latencies, 0.50),
+    "p99_ms": percentile_ms(latencies, 0.99),
+  }
+
+class RSSSampler:
+  # ru_maxrss is the peak of the whole process, a scenario is measured against its own start
+  def __init__(self, interval:float = 0.02):
+    self.interval = interval
+    self.start = self.peak = self.current()
+
+  @staticmethod
+  def current()->int:
+    current, max_rss = rss_bytes()
+    return current if current is not None else max_rss
+
+  async def sample(self):
+    while True:
+      self.peak = max(self.peak, self.current())
+      await asyncio.sleep(self.interval)
+
+  def report(self)->dict:
+    end = self.current()
+    self.peak = max(self.peak, end)
+    return {
+      "rss_mb": end / 1024**2,
+      "rss_delta_mb": (end - self.start) / 1024**2,
+      "peak_rss_delta_mb": (self.peak - self.start) / 1024**2,
+    }
+
+async def run(args)->dict:
+  file_path = os.path.join(tempfile.mkdtemp(prefix="gradio2api-bench-"), "large_file.bin")
+  with open(file_path, "wb") as f:
+    f.write(os.urandom(int(args.file_mb * 1024**2)))
+
+  app = build_app(args.fixtures, args.mounts, args.sleep_ms, file_path)
+  transport = httpx.ASGITransport(app=app)
+  scenarios = []
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+    for mount in args.mounts:
+      for name in args.fixtures:
+        send = make_request(name, f"/{mount}/{name}")
+        await drive(client, send, args.warmup, 1)
+        sampler = RSSSampler()
+        sampling = asyncio.create_task(sampler.sample())
+        try:
+          result = await drive(client, send, args.requests, args.concurrency)
+        finally:
+          sampling.cancel()
+        scenarios.append({
+          "scenario": name,
+          "mount": mount,
+          **result,
+          **sampler.report(),
+        })
+        print("[BENCH]", mount, name, f"{result['throughput_rps']:.1f} rps", file=sys.stderr)
+
+  return {
+    "created_at": time.time(),
+    "python": platform.python_version(),
+    "gradio": gr.__version__,
+    "args": vars(args),
+    "scenarios": scenarios,
+  }
+
+def cli_bench(argv:list[str] | None = None):
+  parser = argparse.ArgumentParser(
+    prog="gradio2api bench",
+    description="Benchmark gradio2api routes against local gradio fixtures, results are printed as json.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+  )
+  parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES), choices=FIXTURES, help="The fixtures to benchmark.")
+  parser.add_argument("--mounts", nargs="+", default=list(MOUNTS), choices=MOUNTS, help="Serve fixtures through LocalGradioAppRouter (loopback or direct), Aggregator or all of them.")
+  parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+  parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight.")
+  parser.add_argument("--warmup", type=int, default=5, help="Sequential requests before measuring a scenario.")
+  parser.add_argument("--sleep_ms", type=float, default=100.0, help="The latency of the sleep fixture.")
+  parser.add_argument("--file_mb", type=float, default=8.0, help="The size of the large_file fixture output.")
+  parser.add_argument("--output", type=str, default=None, help="The json file to write, default to stdout.")
+  args = parser.parse_args(argv)
+
+  report = json.dumps(asyncio.run(run(args)), indent=2)
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(report)
+  else:
+    print(report)
@@ -0,0 +1,143 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import CancelledError
+from gradio_client.exceptions import AppError
+import threading
+import time
+
+BREAKER_STATE = Literal["closed", "open", "half_open"]
+
+class BreakerConfig(BaseModel):
+  failure_threshold: int = 5 # consecutive failures before the circuit opens
+  reset_timeout: float = 30.0 # seconds open before a probe is let through
+  half_open_max_calls: int = 1
+  # per endpoint timeout: timeout_percentile of recent latencies times timeout_multiplier
+  timeout_percentile: float = 0.99
+  timeout_multiplier: float = 3.0
+  min_timeout: float = 5.0
+  max_timeout: float = 300.0 # also used until min_samples latencies are observed
+  min_samples: int = 20
+  window: int = 200
+
+class BreakerStatus(BaseModel):
+  state: BREAKER_STATE
+  consecutive_failures: int
+  opened_at: Optional[float] = None
+  rejected: int = 0
+  timeouts: int = 0
+  timeout_seconds: dict[str, float] = {}
+
+class CircuitOpen(Exception):
+  def __init__(self, retry_after:float):
+    super().__init__(f"upstream circuit is open, retry after {retry_after:.1f}s")
+    self.retry_after = retry_after
+
+class UpstreamTimeout(TimeoutError):
+  ...
+
+def job_exception(job)->BaseException | None:
+  # exception() raises on a cancelled gradio_client Job instead of returning
+  return CancelledError() if job.cancelled() else job.exception()
+
+# one breaker per upstream app, shared by its endpoints
+class CircuitBreaker:
+  config: BreakerConfig
+  state: BREAKER_STATE
+
+  def __init__(self, config:BreakerConfig | None = None):
+    self.config = config or BreakerConfig()
+    self.state = "closed"
+    self.consecutive_failures = 0
+    self.opened_at = None
+    self.rejected = 0
+    self.timeouts = 0
+    self.__probing = 0
+    self.__latencies: dict[str, deque[float]] = {}
+    self.__lock = threading.Lock()
+
+  def _retry_after(self)->float:
+    return self.opened_at + self.config.reset_timeout - time.time()
+
+  def check(self):
+    # fail fast without taking a probe slot
+    if self.state == "open" and self._retry_after() > 0:
+      self.rejected += 1
+      raise CircuitOpen(self._retry_after())
+
+  def before_call(self):
+    with self.__lock:
+      if self.state == "closed":
+        return
+      if self.state == "open":
+        if self._retry_after() > 0:
+          self.rejected += 1
+          raise CircuitOpen(self._retry_after())
+        self.state = "half_open"
+        self.__probing = 0
+      if self.__probing >= self.config.half_open_max_calls:
+        self.rejected += 1
+        raise CircuitOpen(self.config.reset_timeout)
+      self.__probing += 1
+
+  def record(self, api_name:str, latency:float, exc:BaseException | None = None, observe:bool = True):
+    with self.__lock:
+      if self.state == "half_open":
+        self.__probing = max(0, self.__probing - 1)
+      if exc is not None and not isinstance(exc, Exception):
+        return # cancelled by our side, says nothing about the upstream
+
+      # an AppError is raised by the upstream function, the upstream itself is fine
+      if exc is None or isinstance(exc, AppError):
+        self.consecutive_failures = 0
+        self.state = "closed"
+        if exc is None and observe:
+          self.__latencies.setdefault(api_name, deque(maxlen=self.config.window)).append(latency)
+        return
+
+      self.consecutive_failures += 1
+      if isinstance(exc, UpstreamTimeout):
+        self.timeouts += 1
+      if self.state == "half_open" or self.consecutive_failures >= self.config.failure_threshold:
+        if self.state != "open":
+          print("[OPEN CIRCUIT]", api_name, exc)
+        self.state = "open"
+        self.opened_at = time.time()
+
+  @contextmanager
+  def guard(self, api_name:str, observe:bool = True):
+    self.before_call()
+    start = time.perf_counter()
+    exc = None
+    try:
+      yield
+    except BaseException as e:
+      exc = e
+      raise
+    finally:
+      self.record(api_name, time.perf_counter() - start, exc, observe)
+
+  def timeout_for(self, api_name:str)->float:
+    latencies = self.__latencies.get(api_name)
+    if latencies is None or len(latencies) < self.config.min_samples:
+      return self.config.max_timeout
+    latencies = sorted(latencies)
+    percentile = latencies[min(len(latencies) - 1, int(self.config.timeout_percentile * len(latencies)))]
+    return min(
+      self.config.max_timeout,
+      max(self.config.min_timeout, percentile * self.config.timeout_multiplier),
+    )
+
+  def status(self)->BreakerStatus:
+    return BreakerStatus(
+      state=self.state,
+      consecutive_failures=self.consecutive_failures,
+      opened_at=self.opened_at,
+      rejected=self.rejected,
+      timeouts=self.timeouts,
+      timeout_seconds={
+        api_name: self.timeout_for(api_name)
+        for api_name in list(self.__latencies)
+      },
+    )
@@ -0,0 +1,146 @@
+from pydantic import BaseModel
+from typing import TYPE_CHECKING, Any, Optional
+from collections import OrderedDict
+from .utils.hash import _make_hash
+import threading
+import asyncio
+import pickle
+import time
+import os
+
+if TYPE_CHECKING:
+  from .output_store import OutputStore
+
+class CacheConfig(BaseModel):
+  api_names: Optional[list[str]] = None # default to every endpoint of the app
+  max_entries: int = 1024
+  ttl: Optional[float] = None # seconds
+  disk_dir: Optional[str] = None # second tier, survives restarts
+
+class CacheStats(BaseModel):
+  hits: int = 0
+  disk_hits: int = 0
+  misses: int = 0
+  bypasses: int = 0
+  entries: int = 0
+
+MISS = object()
+
+class ResultCache:
+  config: CacheConfig
+  stats: CacheStats
+
+  def __init__(self, config:CacheConfig, namespace:str, output_store:"OutputStore | None" = None):
+    self.config = config
+    self.output_store = output_store # cached file outputs live there and can be evicted
+    self.stats = CacheStats()
+    self.__memory: OrderedDict[str, tuple[float | None, Any]] = OrderedDict()
+    self.disk_dir = None
+    if config.disk_dir:
+      self.disk_dir = os.path.join(config.disk_dir, _make_hash(namespace))
+      os.makedirs(self.disk_dir, exist_ok=True)
+
+  @classmethod
+  def for_api(
+      cls,
+      config:CacheConfig | None,
+      namespace:str,
+      api_name:str,
+      output_store:"OutputStore | None" = None,
+    )->Optional["ResultCache"]:
+    if config is None:
+      return None
+    if config.api_names is not None and api_name not in config.api_names:
+      return None
+    return cls(config, namespace=f"{namespace}{api_name}", output_store=output_store)
+
+  def _expires_at(self)->float | None:
+    if self.config.ttl is None:
+      return None
+    return time.time() + self.config.ttl
+
+  @staticmethod
+  def _is_expired(expires_at:float | None)->bool:
+    return expires_at is not None and expires_at < time.time()
+
+  def _is_stale(self, expires_at:float | None, value)->bool:
+    if self._is_expired(expires_at):
+      return True
+    # a hit must not hand out a file the OutputStore has evicted
+    return self.output_store is not None and self.output_store.has_missing_files(value)
+
+  def _disk_path(self, key:str)->str:
+    return os.path.join(self.disk_dir, f"{key}.pkl")
+
+  def _get_memory(self, key:str):
+    if key in self.__memory:
+      expires_at, value = self.__memory[key]
+      if not self._is_stale(expires_at, value):
+        self.__memory.move_to_end(key)
+        self.stats.hits += 1
+        return value
+      del self.__memory[key]
+      self.stats.entries = len(self.__memory)
+    return MISS
+
+  def _load_disk(self, key:str):
+    # blocking, returns (expires_at, value) or MISS
+    if not os.path.exists(path := self._disk_path(key)):
+      return MISS
+    try:
+      with open(path, "rb") as f:
+        expires_at, value = pickle.load(f)
+    except Exception:
+      expires_at, value = 0.0, None
+    if self._is_stale(expires_at, value):
+      os.remove(path)
+      return MISS
+    return expires_at, value
+
+  def _write_disk(self, key:str, expires_at:float | None, value):
+    tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+      pickle.dump((expires_at, value), f)
+    os.replace(tmp_path, self._disk_path(key))
+
+  def _from_disk(self, key:str, loaded):
+    if loaded is MISS:
+      self.stats.misses += 1
+      return MISS
+    expires_at, value = loaded
+    self._set_memory(key, expires_at, value)
+    self.stats.disk_hits += 1
+    return value
+
+  def get(self, key:str):
+    if (value := self._get_memory(key)) is not MISS:
+      return value
+    return self._from_disk(key, self._load_disk(key) if self.disk_dir else MISS)
+
+  async def aget(self, key:str):
+    # memory hits stay on the event loop, the disk tier is read in a worker thread
+    if (value := self._get_memory(key)) is not MISS:
+      return value
+    loaded = MISS
+    if self.disk_dir:
+      loaded = await asyncio.get_running_loop().run_in_executor(None, self._load_disk, key)
+    return self._from_disk(key, loaded)
+
+  def _set_memory(self, key:str, expires_at:float | None, value):
+    self.__memory[key] = (expires_at, value)
+    self.__memory.move_to_end(key)
+    while len(self.__memory) > self.config.max_entries:
+      self.__memory.popitem(last=False)
+    self.stats.entries = len(self.__memory)
+
+  def set(self, key:str, value):
+    expires_at = self._expires_at()
+    self._set_memory(key, expires_at, value)
+    if self.disk_dir:
+      self._write_disk(key, expires_at, value)
+
+  async def aset(self, key:str, value):
+    expires_at = self._expires_at()
+    self._set_memory(key, expires_at, value)
+    if self.disk_dir:
+      await asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, expires_at, value)
@@ -1,11 +1,24 @@
 from fastapi import FastAPI
-from .clients_aggregator import create_gradio2api
+from .clients_aggregator import create_gradio2api, snapshot_servers
 import argparse
+import tempfile
 import uvicorn
 import json
-import gradio as gr
+import sys
+import os
+
+WORKER_CONFIG_ENV = "GRADIO2API_WORKER_CONFIG"
+ADMIN_TOKEN_ENV = "GRADIO2API_ADMIN_TOKEN"
+
+def create_worker_app()->FastAPI:
+  # uvicorn factory of each --workers process, routes come from the master's snapshots
+  return create_gradio2api(**json.loads(os.environ[WORKER_CONFIG_ENV]))
 
 def cli_remote():
+  if sys.argv[1:2] == ["bench"]:
+    from .bench import cli_bench
+    return cli_bench(sys.argv[2:])
+
   parser = argparse.ArgumentParser(
     description="""\
     This is the command line tool for gradio2api remote server, please use `gardio2api.Aggregator` detail setting.
@@ -20,15 +33,36 @@ def cli_remote():
   parser.add_argument("--gradio_client_config_path", type=str, default=None, help="The json file path of gradio_client.")
   parser.add_argument("--host", type=str, default="127.0.0.1", help="The host for uvicorn.")
   parser.add_argument("--port", type=int, default=8000, help="The port for uvicorn.")
+  parser.add_argument("--workers", type=int, default=1, help="The number of uvicorn worker processes, upstreams are introspected once by the master.")
+  parser.add_argument("--max_parallel_builds", type=int, default=8, help="The number of upstream apps introspected concurrently at startup.")
+  parser.add_argument("--snapshot_dir", type=str, default=None, help="The directory caching upstream schemas, routes are served from it on warm restarts.")
+  parser.add_argument("--build_timeout", type=float, default=None, help="The deadline in seconds for building a single upstream app.")
+
+  parser.add_argument("--gui_mode", type=str, default="eager", choices=["eager", "lazy", "none"], help="Build the GUI at startup, on first visit of each app, or never (API only).")
+  parser.add_argument("--gui_idle_timeout", type=float, default=None, help="Seconds before an unused lazy GUI is evicted.")
+
+  parser.add_argument("--admin_token", type=str, default=os.environ.get(ADMIN_TOKEN_ENV), help=f"Serve /admin/apps endpoints to add, remove and refresh apps without restarting, callers send the token as 'Authorization: Bearer <token>'. Read from {ADMIN_TOKEN_ENV} by default, off when unset. Single process only, it can not be combined with --workers.")
+
+  parser.add_argument("--output_dir", type=str, default=None, help="The directory managing files downloaded from upstream apps, one sub directory per app.")
+  parser.add_argument("--output_max_bytes", type=int, default=5 * 1024**3, help="The disk quota of --output_dir, least recently used outputs are evicted first.")
+  parser.add_argument("--output_ttl", type=float, default=24 * 3600, help="Seconds an output is kept after its last access.")
+
+  parser.add_argument("--max_inflight", type=int, default=None, help="Upstream calls in flight over every app (per worker), the rest wait by priority and weight.")
+  parser.add_argument("--admission", type=json.loads, default=None, help="""Per app admission control as json, e.g. '{"/video": {"max_concurrency": 2, "max_queue": 16}, "/text": {"priority": 10}}'. Full queues answer 429 with Retry-After.""")
 
   group = parser.add_mutually_exclusive_group(required=False)
   group.add_argument('--allow-error', dest='error_allowed', action='store_true', help="Allow error")
   group.add_argument('--not-allow-error', dest='error_allowed', action='store_false', help="Do not allow error")
   parser.set_defaults(error_allowed=True)
 
-  kwargs = parser.parse_args().__dict__
+  args = parser.parse_args()
+  if args.admin_token and args.workers > 1:
+    # every worker has its own route table, a change would reach one process only
+    parser.error("--admin_token can not be combined with --workers > 1")
+  kwargs = args.__dict__
   host = kwargs.pop("host")
   port = kwargs.pop("port")
+  workers = kwargs.pop("workers")
 
   servers = kwargs.pop("servers")
   kwargs["servers"] = []
@@ -44,6 +78,23 @@ def cli_remote():
       "prefix":prefix,
     })
 
+  if workers > 1:
+    kwargs["snapshot_dir"] = kwargs["snapshot_dir"] or tempfile.mkdtemp(prefix="gradio2api-snapshots-")
+    snapshot_servers(
+      kwargs["servers"],
+      snapshot_dir=kwargs["snapshot_dir"],
+      max_parallel_builds=kwargs["max_parallel_builds"],
+    )
+    os.environ[WORKER_CONFIG_ENV] = json.dumps({**kwargs, "revalidate_snapshots": False})
+    uvicorn.run(
+      "gradio2api.cli:create_worker_app",
+      factory=True,
+      host=host,
+      port=port,
+      workers=workers,
+    )
+    return
+
   app = create_gradio2api(**kwargs)
 
   uvicorn.run(
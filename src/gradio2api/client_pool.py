@@ -0,0 +1,178 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from gradio_client import Client
+from gradio_client.client import Job
+from gradio_client.exceptions import AppError
+from .utils.gr_client_utils import LoadGradioClient
+from .breaker import job_exception
+import threading
+import time
+
+LOAD_BALANCE_STRATEGY = Literal["least_outstanding", "ewma"]
+
+class ReplicaStatus(BaseModel):
+  src: str
+  healthy: bool
+  outstanding: int
+  ewma_latency: Optional[float] = None
+  consecutive_failures: int = 0
+
+class Replica:
+  src: str
+  client: Client | None
+  healthy: bool
+  outstanding: int
+  ewma_latency: float | None
+  consecutive_failures: int
+
+  def __init__(self, src:str):
+    self.src = src
+    self.client = None
+    self.healthy = False
+    self.outstanding = 0
+    self.ewma_latency = None
+    self.consecutive_failures = 0
+
+  def status(self)->ReplicaStatus:
+    return ReplicaStatus(
+      src=self.src,
+      healthy=self.healthy,
+      outstanding=self.outstanding,
+      ewma_latency=self.ewma_latency,
+      consecutive_failures=self.consecutive_failures,
+    )
+
+class ClientPool:
+  replicas: list[Replica]
+  strategy: LOAD_BALANCE_STRATEGY
+
+  def __init__(
+      self,
+      srcs:list[str],
+      strategy:LOAD_BALANCE_STRATEGY="least_outstanding",
+      max_failures:int=3, # consecutive failures before a replica is ejected
+      probe_interval:float=10.0,
+      ewma_alpha:float=0.3,
+      **gr_client_kwargs,
+    ):
+    assert len(srcs) > 0
+    self.replicas = [Replica(src) for src in srcs]
+    self.strategy = strategy
+    self.max_failures = max_failures
+    self.probe_interval = probe_interval
+    self.ewma_alpha = ewma_alpha
+    self.gr_client_kwargs = gr_client_kwargs
+    self.__lock = threading.Lock()
+    self.__prober = None
+
+    # a single upstream keeps the retrying loader, replicas are recovered by the prober
+    connect = LoadGradioClient if len(srcs) == 1 else Client
+    errors = []
+    for replica in self.replicas:
+      try:
+        replica.client = connect(replica.src, **gr_client_kwargs)
+        replica.healthy = True
+      except Exception as e:
+        errors.append(e)
+        print("[SKIP REPLICA]", replica.src, e)
+
+    if not any(replica.healthy for replica in self.replicas):
+      raise errors[0]
+    if not all(replica.healthy for replica in self.replicas):
+      self._start_prober()
+
+  @property
+  def primary(self)->Client:
+    # introspection and GUI building use the first replica that connected
+    for replica in self.replicas:
+      if replica.client is not None:
+        return replica.client
+    raise RuntimeError("no replica connected")
+
+  def view_api(self, *args, **kwargs):
+    return self.primary.view_api(*args, **kwargs)
+
+  def status(self)->list[ReplicaStatus]:
+    return [replica.status() for replica in self.replicas]
+
+  def _score(self, replica:Replica)->tuple:
+    if self.strategy == "ewma":
+      return ((replica.ewma_latency or 0.0) * (replica.outstanding + 1), replica.outstanding)
+    return (replica.outstanding, replica.ewma_latency or 0.0)
+
+  def _acquire(self)->Replica:
+    with self.__lock:
+      candidates = [
+        replica for replica in self.replicas
+        if replica.healthy and replica.client is not None
+      ]
+      if not candidates: # every replica is ejected, keep trying rather than failing fast
+        candidates = [replica for replica in self.replicas if replica.client is not None]
+      replica = min(candidates, key=self._score)
+      replica.outstanding += 1
+      return replica
+
+  def _release(self, replica:Replica, start:float, job:Job):
+    latency = time.perf_counter() - start
+    exc = job_exception(job)
+    with self.__lock:
+      replica.outstanding -= 1
+      if exc is None or isinstance(exc, AppError):
+        # an AppError is raised by the upstream function, the replica itself is fine
+        replica.consecutive_failures = 0
+        if replica.ewma_latency is None:
+          replica.ewma_latency = latency
+        else:
+          replica.ewma_latency += self.ewma_alpha * (latency - replica.ewma_latency)
+        return
+
+      replica.consecutive_failures += 1
+      ejected = replica.healthy and replica.consecutive_failures >= self.max_failures
+      if ejected:
+        replica.healthy = False
+    if ejected:
+      print("[EJECT REPLICA]", replica.src, exc)
+      self._start_prober()
+
+  def submit(self, *args, **kwargs)->Job:
+    replica = self._acquire()
+    start = time.perf_counter()
+    try:
+      job = replica.client.submit(*args, **kwargs)
+    except Exception:
+      with self.__lock:
+        replica.outstanding -= 1
+      raise
+    job.add_done_callback(lambda job: self._release(replica, start, job))
+    return job
+
+  def predict(self, *args, **kwargs):
+    return self.submit(*args, **kwargs).result()
+
+  def _start_prober(self):
+    with self.__lock:
+      if self.__prober is not None and self.__prober.is_alive():
+        return
+      self.__prober = threading.Thread(
+        target=self._probe_unhealthy,
+        name="gradio2api-probe",
+        daemon=True,
+      )
+      self.__prober.start()
+
+  def _probe_unhealthy(self):
+    while True:
+      unhealthy = [replica for replica in self.replicas if not replica.healthy]
+      if not unhealthy:
+        return
+      time.sleep(self.probe_interval)
+      for replica in unhealthy:
+        try:
+          client = Client(replica.src, **self.gr_client_kwargs)
+        except Exception:
+          continue
+        with self.__lock:
+          replica.client = client
+          replica.consecutive_failures = 0
+          replica.healthy = True
+        print("[RESTORE REPLICA]", replica.src)
@@ -1,44 +1,160 @@
 from typing import Any
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, PrivateAttr, model_validator
 from .gr_fastapi import RemoteGradioAppRouter
+from .gr_application import save_snapshot, VALIDATION_MODE
+from .utils.snapshot import SnapshotStore
+from .utils.upstream import UpstreamRegistry, canonical_uri
+from .utils.memory import rss_bytes
+from .client_pool import LOAD_BALANCE_STRATEGY, ReplicaStatus
+from .batching import BatchConfig, BatchStats
+from .cache import CacheConfig, CacheStats
+from .utils.singleflight import SingleFlightStats
+from .jobs import JobStoreConfig
+from .files import FILE_OUTPUT
+from .output_store import OutputStore, OutputStoreConfig, OutputStoreStats
+from .breaker import BreakerConfig, BreakerStatus
+from .encoding import EncodingConfig
+from .admission import AdmissionConfig, AdmissionScheduler, AdmissionStats
+from .metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from .utils.hash import add_key_and_verify as add_prefix_and_verify
 from typing_extensions import Self
-from typing import Optional
-from fastapi import APIRouter, FastAPI
-import gradio as gr
+from typing import TYPE_CHECKING, Optional, Callable, Literal
+from fastapi import APIRouter, FastAPI, Request, HTTPException, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.routing import BaseRoute
+from fastapi.responses import PlainTextResponse
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 import traceback
-import pandas as pd
+import secrets
+import functools
+import asyncio
 import json
+import time
+
+if TYPE_CHECKING: # gradio and pandas are only imported to build GUIs
+  import gradio as gr
 
 class AppConfig(BaseModel):
-  uri:str
+  uri:str | list[str] # a list registers replicas of one app under the prefix
   prefix: str
+  max_concurrency: Optional[int] = None # upstream calls in flight, default GRADIO2API_MAX_CONCURRENCY
+  load_balance: LOAD_BALANCE_STRATEGY = "least_outstanding"
+  batching: Optional[BatchConfig] = None # opt-in micro-batching for batch=True functions
+  cache: Optional[CacheConfig] = None # opt-in result cache for deterministic endpoints
+  single_flight: bool | list[str] = False # share one upstream job between identical in-flight requests
+  jobs: Optional[JobStoreConfig] = None # store behind the {api_name}/jobs endpoints
+  file_output: FILE_OUTPUT = "path" # "url" serves output files from {prefix}/files
+  breaker: Optional[BreakerConfig] = None # fail fast with 503 and adaptive timeouts for a failing upstream
+  admission: Optional[AdmissionConfig] = None # concurrency caps, bounded queue and priority of the prefix
+  bulk_concurrency: int = 8 # items of one {api_name}/batch request in flight
+  validation: VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict" # "lax" or "trusted" skip re-validating outputs, a dict sets it per api name
+  encoding: Optional[EncodingConfig] = None # Accept driven orjson / MessagePack responses, gzip or zstd above a size
 
   # @model_validator(mode="after")
   # def check_pefix(self)->Self:
   #   add_prefix_and_verify(self.prefix)
   #   return self
 
+GUI_MODE = Literal["eager", "lazy", "none"]
+
 class Status(BaseModel):
   api_success: bool
-  gui_success: bool
+  gui_success: Optional[bool] # None while the GUI is not built
   api_building_error_msg: Optional[str] = None
   gui_building_error_msg: Optional[str] = None
+  from_snapshot: bool = False
+  schema_drift: Optional[bool] = None # None until the snapshot is revalidated
+  connection_error: Optional[str] = None # last failed connect of an app served from a snapshot, retried in background
+  breaker: Optional[BreakerStatus] = None
+
+class Timings(BaseModel):
+  api_building_seconds: Optional[float] = None
+  gui_building_seconds: Optional[float] = None
 
 class PostAppConfig(AppConfig):
   status:Status
+  timings:Timings = Timings()
   api_names: Optional[list[str]] = None
   num_of_apis:Optional[int] = None
+  replicas: Optional[list[ReplicaStatus]] = None
+  batch_stats: Optional[dict[str, BatchStats]] = None
+  cache_stats: Optional[dict[str, CacheStats]] = None
+  single_flight_stats: Optional[dict[str, SingleFlightStats]] = None
+  admission_stats: Optional[AdmissionStats] = None
+  _router: Optional[RemoteGradioAppRouter] = PrivateAttr(default=None)
+
+  def refresh(self):
+    if self._router is None:
+      return
+    application = self._router.gradio_application
+    self.status.schema_drift = application.schema_drift
+    self.status.connection_error = application.upstream.connection_error
+    if application.breaker is not None:
+      self.status.breaker = application.breaker.status()
+    if self._router.admission is not None:
+      self.admission_stats = self._router.admission.stats
+    if len(application.srcs) > 1:
+      self.replicas = application.client.status()
+    self.batch_stats = {
+      api_name: api.batcher.stats
+      for api_name, api in application.apis.items()
+      if api.batcher is not None
+    } or None
+    self.cache_stats = {
+      api_name: api.cache.stats
+      for api_name, api in application.apis.items()
+      if api.cache is not None
+    } or None
+    self.single_flight_stats = {
+      api_name: api.single_flight.stats
+      for api_name, api in application.apis.items()
+      if api.single_flight is not None
+    } or None
+
+class MemoryStats(BaseModel):
+  rss_bytes: Optional[int] = None
+  max_rss_bytes: Optional[int] = None
+  prefixes: int = 0
+  upstreams: int = 0 # distinct clients and introspections, shared by prefixes of one upstream
+  endpoints: int = 0
+  endpoint_schemas: int = 0 # distinct schemas and models, shared by identical endpoints
+  introspection_bytes: int = 0
 
 class Info(BaseModel):
   info: list[PostAppConfig] = []
+  output_store: Optional[OutputStoreStats] = None
+  memory: MemoryStats = MemoryStats()
+
+def _endpoints(routers:list[APIRouter])->set:
+  return {route.endpoint for router in routers for route in router.routes if hasattr(route, "endpoint")}
+
+def _includes(routes:list[BaseRoute], router:APIRouter)->bool:
+  # recent FastAPI keeps a reference to an included router instead of copying its routes
+  for route in routes:
+    included = getattr(route, "original_router", None)
+    if included is router or (included is not None and _includes(included.routes, router)):
+      return True
+  return False
+
+def _routes_changed(router:APIRouter, removed:list[APIRouter]):
+  # recent FastAPI caches included routes by the sum of the routers' versions, it must only grow
+  if hasattr(router, "_get_routes_version"):
+    router._routes_version += 1 + sum(removed_router._get_routes_version() for removed_router in removed)
 
 class Aggregator(APIRouter):
   config_list : list[AppConfig | dict]
   graido_app_routers: dict[str, list[RemoteGradioAppRouter]]
-  gradio_guis: dict[str, list[gr.Blocks]]
+  gradio_guis: dict[str, list["gr.Blocks"]]
+  gradio_gui_builders: dict[str, list[Callable[[], "gr.Blocks"]]]
+  gui_mode: GUI_MODE
   error_allowed_api:bool
   error_allowed_gui:bool
+  max_parallel_builds:int
+  build_timeout:float | None
+  snapshot_store:SnapshotStore | None
+  output_store:OutputStore | None
+  scheduler:AdmissionScheduler
+  upstreams:UpstreamRegistry
   info: Info
 
   def __init__(
@@ -47,44 +163,156 @@ class Aggregator(APIRouter):
       error_allowed_api:bool=False,
       error_allowed_gui:bool=True, # TODO: design for customize package
       *router_args,
+      max_parallel_builds:int=8,
+      build_timeout:float | None=None, # seconds, per app
+      snapshot_dir:str | None=None,
+      revalidate_snapshots:bool=True, # False when snapshots are refreshed by another process
+      gui_mode:GUI_MODE="eager",
+      output_store:OutputStoreConfig | None=None, # quota and eviction for downloaded outputs
+      admin_token:str | None=None, # enables /admin/apps to add, remove and refresh apps at runtime, sent as a Bearer token
+      drain_timeout:float=30.0, # seconds replaced apps get to finish in-flight calls
+      max_inflight:int | None=None, # upstream calls in flight over every app, the rest wait by priority
       **router_kwargs,
     ):
     super().__init__(*router_args, **router_kwargs)
     self.get("/info")(self.get_info)
+    self.get("/metrics", response_class=PlainTextResponse)(self.get_metrics)
+    self.__admin_token = admin_token
+    if admin_token:
+      # they connect to any uri and drop apps, never served without a token
+      guard = [Depends(self._check_admin_token)]
+      self.post("/admin/apps", dependencies=guard)(self.add_app)
+      self.delete("/admin/apps", dependencies=guard)(self.remove_app)
+      self.post("/admin/apps/refresh", dependencies=guard)(self.refresh_app)
+    self.drain_timeout = drain_timeout
+    self.__admin_lock = asyncio.Lock()
+    self.__draining: set[asyncio.Task] = set()
 
     self.config_list = []
     self.graido_app_routers = dict()
     self.gradio_guis = dict()
+    self.gradio_gui_builders = dict()
+    self.gui_mode = gui_mode
     self.info = Info()
     self.error_allowed_api = error_allowed_api
     self.error_allowed_gui = error_allowed_gui
+    self.max_parallel_builds = max_parallel_builds
+    self.build_timeout = build_timeout
+    self.snapshot_store = (
+      SnapshotStore(snapshot_dir, revalidate=revalidate_snapshots)
+      if snapshot_dir else None
+    )
+    self.output_store = OutputStore(output_store) if output_store else None
+    if self.output_store is not None:
+      self.info.output_store = self.output_store.stats
+    self.scheduler = AdmissionScheduler(max_inflight)
+    self.upstreams = UpstreamRegistry()
 
     self.assign_from_config_list(config_list)
 
+  def _check_admin_token(
+      self,
+      credentials:HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False)),
+    ):
+    if credentials is None or not secrets.compare_digest(
+      credentials.credentials.encode(), self.__admin_token.encode(),
+    ):
+      raise HTTPException(status_code=401, detail="invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
   def get_info(self)->Info:
+    for post_config in self.info.info:
+      post_config.refresh()
+    self.info.memory = self.memory_stats()
     return self.info
 
+  def memory_stats(self)->MemoryStats:
+    applications = [
+      router.gradio_application
+      for routers in self.graido_app_routers.values()
+      for router in routers
+    ]
+    upstreams = {id(application.upstream): application.upstream for application in applications}
+    current_rss, max_rss_bytes = rss_bytes()
+    return MemoryStats(
+      rss_bytes=current_rss,
+      max_rss_bytes=max_rss_bytes,
+      prefixes=len(self.graido_app_routers),
+      upstreams=len(upstreams),
+      endpoints=sum(len(application.apis) for application in applications),
+      endpoint_schemas=len({
+        api.schema.hash
+        for application in applications
+        for api in application.apis.values()
+      }),
+      introspection_bytes=sum(upstream.introspection_bytes for upstream in upstreams.values()),
+    )
+
+  def get_metrics(self)->PlainTextResponse:
+    return PlainTextResponse(
+      render_metrics(
+        endpoint
+        for routers in self.graido_app_routers.values()
+        for router in routers
+        for endpoint in router.endpoint_metrics
+      ),
+      media_type=METRICS_CONTENT_TYPE,
+    )
+
   @classmethod
   def _normalize_config(cls, config:list[AppConfig|dict]):
     if isinstance(config, AppConfig):
       return config
     return AppConfig(**config)
 
-  def assign_from_config(self, config:AppConfig|dict):
+  def _build_router(self, config:AppConfig)->tuple[RemoteGradioAppRouter, float]:
+    start = time.perf_counter()
+    router = RemoteGradioAppRouter(
+      gradio_uri=config.uri,
+      prefix=config.prefix,
+      max_concurrency=config.max_concurrency,
+      snapshot_store=self.snapshot_store,
+      load_balance=config.load_balance,
+      batching=config.batching,
+      cache=config.cache,
+      single_flight=config.single_flight,
+      output_store=self.output_store,
+      breaker=config.breaker,
+      validation=config.validation,
+      jobs=config.jobs,
+      file_output=config.file_output,
+      admission=config.admission,
+      scheduler=(
+        self.scheduler
+        if config.admission is not None or self.scheduler.max_concurrency is not None
+        else None
+      ),
+      bulk_concurrency=config.bulk_concurrency,
+      encoding=config.encoding,
+      upstreams=self.upstreams,
+    )
+    return router, time.perf_counter() - start
+
+  def assign_from_config(
+      self,
+      config:AppConfig|dict,
+      built:Future | None = None,
+      build_gui:bool = True,
+    )->PostAppConfig:
     config = self._normalize_config(config)
     self.config_list.append(config)
 
-    uri = config.uri
     prefix = config.prefix
     api_building_error_msg = None
     gui_building_error_msg = None
     api_names = []
+    timings = Timings()
+    router = None
 
     try:
-      router = RemoteGradioAppRouter(
-        gradio_uri=uri,
-        prefix=prefix,
-      )
+      if built is None:
+        router, timings.api_building_seconds = self._build_router(config)
+      else:
+        router, timings.api_building_seconds = built.result()
       api_names = list(router.gradio_application.apis.keys())
 
       if prefix not in self.graido_app_routers:
@@ -99,14 +327,25 @@ class Aggregator(APIRouter):
       else:
         raise e
 
+    gui_mode = self.gui_mode if build_gui else "none"
     try:
-      gui = router.load_gr_blocks(
-        prefix=prefix,
-      )
-      if prefix not in self.gradio_guis:
-          self.gradio_guis[prefix] = []
-      
-      self.gradio_guis[prefix].append(gui)
+      if gui_mode == "eager":
+        start = time.perf_counter()
+        gui = router.load_gr_blocks(
+          prefix=prefix,
+        )
+        timings.gui_building_seconds = time.perf_counter() - start
+        if prefix not in self.gradio_guis:
+            self.gradio_guis[prefix] = []
+        
+        self.gradio_guis[prefix].append(gui)
+      elif gui_mode == "lazy" and router is not None:
+        if prefix not in self.gradio_gui_builders:
+            self.gradio_gui_builders[prefix] = []
+
+        self.gradio_gui_builders[prefix].append(
+          functools.partial(router.load_gr_blocks, prefix=prefix)
+        )
     except Exception as e:
       if self.error_allowed_gui:
         gui_building_error_msg = traceback.format_exc()
@@ -114,27 +353,214 @@ class Aggregator(APIRouter):
       else:
         raise e
 
-    self.info.info.append(
-      PostAppConfig(
-        uri=uri,
-        prefix=prefix,
-        status=Status(
-          api_success=api_building_error_msg is None,
-          api_building_error_msg=api_building_error_msg,
-          gui_success=gui_building_error_msg is None,
-          gui_building_error_msg=gui_building_error_msg,
+    post_config = PostAppConfig(
+      **config.model_dump(),
+      status=Status(
+        api_success=api_building_error_msg is None,
+        api_building_error_msg=api_building_error_msg,
+        gui_success=(
+          gui_building_error_msg is None
+          if gui_mode == "eager" else None
         ),
-        api_names=api_names,
-        num_of_apis=len(api_names),
+        gui_building_error_msg=gui_building_error_msg,
+        from_snapshot=router is not None and router.gradio_application.from_snapshot,
+      ),
+      timings=timings,
+      api_names=api_names,
+      num_of_apis=len(api_names),
+    )
+    post_config._router = router
+    self.info.info.append(post_config)
+    return post_config
+
+  def _mounted_at(self, app:FastAPI)->str | None:
+    # where FastAPI copied our routes to, found through /info
+    for route in app.router.routes:
+      if getattr(route, "endpoint", None) == self.get_info:
+        return route.path[:-len("/info")]
+    return None
+
+  def _swap_routes(
+      self,
+      app:FastAPI,
+      old:list[RemoteGradioAppRouter],
+      new:list[RemoteGradioAppRouter],
+    ):
+    # no await in between, requests see either the old or the new routes
+    endpoints = _endpoints(old)
+    self.routes[:] = [
+      route for route in self.routes
+      if getattr(route, "original_router", None) not in old
+      and getattr(route, "endpoint", None) not in endpoints
+    ]
+    _routes_changed(self, old) # the new routers were included by assign_from_config
+
+    if not _includes(app.router.routes, self):
+      # older FastAPI copied the routes into the app when it included this router
+      app.router.routes[:] = [
+        route for route in app.router.routes
+        if getattr(route, "endpoint", None) not in endpoints
+      ]
+      prefix = self._mounted_at(app)
+      if prefix is not None:
+        for router in new:
+          app.include_router(router, prefix=prefix)
+    app.openapi_schema = None
+
+  def _forget(self, prefix:str)->list[RemoteGradioAppRouter]:
+    # the routes stay until _swap_routes replaces them
+    routers = self.graido_app_routers.pop(prefix, [])
+    self.config_list[:] = [config for config in self.config_list if config.prefix != prefix]
+    self.info.info[:] = [post_config for post_config in self.info.info if post_config.prefix != prefix]
+    self.gradio_guis.pop(prefix, None)
+    self.gradio_gui_builders.pop(prefix, None)
+    return routers
+
+  async def _drain(self, routers:list[RemoteGradioAppRouter]):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + self.drain_timeout
+    while loop.time() < deadline and (
+      any(
+        metrics.in_flight
+        for router in routers
+        for metrics in router.endpoint_metrics
+      ) or any(
+        api.running_jobs # jobs hold a worker until the upstream finishes
+        for router in routers
+        for api in router.gradio_application.apis.values()
       )
+    ):
+      await asyncio.sleep(0.1)
+    for router in routers:
+      router.gradio_application.executor.shutdown(wait=False)
+
+  def _drain_in_background(self, routers:list[RemoteGradioAppRouter]):
+    task = asyncio.create_task(self._drain(routers))
+    self.__draining.add(task)
+    task.add_done_callback(self.__draining.discard)
+
+  async def _build_in_background(self, config_list:list[AppConfig])->list[Future]:
+    # blocking introspection, the event loop keeps serving the other apps
+    executor = ThreadPoolExecutor(
+      max_workers=max(1, min(self.max_parallel_builds, len(config_list))),
+      thread_name_prefix="gradio2api-build",
     )
+    futures = [executor.submit(self._build_router, config) for config in config_list]
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+    executor.shutdown(wait=False)
+    return futures
+
+  async def add_app(self, config:AppConfig, request:Request)->PostAppConfig:
+    async with self.__admin_lock:
+      if config.prefix in self.graido_app_routers:
+        raise HTTPException(status_code=409, detail=f"prefix {config.prefix} exists, refresh it instead")
+      built, = await self._build_in_background([config])
+      self._forget(config.prefix) # a previous failed attempt
+      post_config = self.assign_from_config(config, built, build_gui=False)
+      if post_config._router is not None:
+        self._swap_routes(request.app, [], [post_config._router])
+      return post_config
+
+  async def remove_app(self, prefix:str, request:Request)->list[PostAppConfig]:
+    async with self.__admin_lock:
+      if not any(config.prefix == prefix for config in self.config_list):
+        raise HTTPException(status_code=404, detail=f"prefix {prefix} not found")
+      removed = [post_config for post_config in self.info.info if post_config.prefix == prefix]
+      routers = self._forget(prefix)
+      self._swap_routes(request.app, routers, [])
+      self.scheduler.unregister(prefix)
+    self._drain_in_background(routers)
+    return removed
+
+  async def refresh_app(self, prefix:str, request:Request)->list[PostAppConfig]:
+    # re-introspect the upstream, the old routes keep serving until the new ones are ready
+    async with self.__admin_lock:
+      config_list = [config for config in self.config_list if config.prefix == prefix]
+      if not config_list:
+        raise HTTPException(status_code=404, detail=f"prefix {prefix} not found")
+      for config in config_list:
+        uri = config.uri if isinstance(config.uri, str) else config.uri[0]
+        # other prefixes of the upstream keep their routers until they are refreshed too
+        self.upstreams.forget(uri)
+        if self.snapshot_store is not None:
+          self.snapshot_store.remove(canonical_uri(uri))
+
+      built = await self._build_in_background(config_list)
+      for config, future in zip(config_list, built):
+        if (exc := future.exception()) is not None:
+          raise HTTPException(status_code=502, detail=f"refreshing {config.uri} failed: {exc}")
+
+      old = self._forget(prefix)
+      post_configs = [
+        self.assign_from_config(config, future, build_gui=False)
+        for config, future in zip(config_list, built)
+      ]
+      new = [post_config._router for post_config in post_configs]
+      for old_router, new_router in zip(old, new):
+        # submitted jobs and published files stay reachable
+        new_router.job_store = old_router.job_store
+        new_router.file_registry = old_router.file_registry
+      self._swap_routes(request.app, old, new)
+    self._drain_in_background(old)
+    return post_configs
+
+  def _build_routers_concurrently(self, config_list:list[AppConfig])->list[Future]:
+    # Client construction and view_api are network bound, run them side by side.
+    # GUI building stays on the caller thread since gr.Blocks contexts are global.
+    started_at: dict[int, float] = {}
+    def _timed_build(idx:int, config:AppConfig):
+      started_at[idx] = time.perf_counter()
+      return self._build_router(config)
+
+    executor = ThreadPoolExecutor(
+      max_workers=max(1, self.max_parallel_builds),
+      thread_name_prefix="gradio2api-build",
+    )
+    futures = {
+      executor.submit(_timed_build, idx, config): idx
+      for idx, config in enumerate(config_list)
+    }
+    results = [Future() for _ in config_list]
+
+    pending = set(futures)
+    while pending:
+      done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+      for future in done:
+        result = results[futures[future]]
+        if (exc := future.exception()) is not None:
+          result.set_exception(exc)
+        else:
+          result.set_result(future.result())
+
+      if self.build_timeout is None:
+        continue
+      now = time.perf_counter()
+      for future in list(pending):
+        idx = futures[future]
+        if idx not in started_at or now - started_at[idx] < self.build_timeout:
+          continue
+        # the worker can not be interrupted, its late result is dropped
+        pending.discard(future)
+        results[idx].set_exception(TimeoutError(
+          f"building {config_list[idx].uri} exceeded {self.build_timeout}s"
+        ))
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    return results
 
   def assign_from_config_list(self, config_list):
-    for config in config_list:
-      self.assign_from_config(config)
+    config_list = [self._normalize_config(config) for config in config_list]
+    if self.max_parallel_builds <= 1 and self.build_timeout is None:
+      for config in config_list:
+        self.assign_from_config(config)
+      return
+
+    for config, built in zip(config_list, self._build_routers_concurrently(config_list)):
+      self.assign_from_config(config, built)
 
   @property
-  def grand_gr_app(self)->gr.Blocks:
+  def grand_gr_app(self)->"gr.Blocks":
+    import gradio as gr
     app = gr.TabbedInterface(
       [self.gr_info, self.gr_app],
       ["Information", "Application"],
@@ -142,7 +568,8 @@ class Aggregator(APIRouter):
     return app
   
   @property
-  def gr_app(self)->gr.TabbedInterface:
+  def gr_app(self)->"gr.TabbedInterface":
+    import gradio as gr
     tabs = []
     names = []
     for prefix, guis in self.gradio_guis.items():
@@ -167,15 +594,42 @@ class Aggregator(APIRouter):
       )
 
     return gr.TabbedInterface(tabs,names)
+
+  def lazy_gr_app(self, idle_timeout:float | None = None):
+    # each upstream GUI is built on the first request under its own path
+    from .lazy_gui import LazyGradioMount
+    import gradio as gr
+
+    builders = {}
+    for prefix, gui_builders in self.gradio_gui_builders.items():
+      path = prefix or "/default"
+      if len(gui_builders) == 1:
+        builders[path] = gui_builders[0]
+        continue
+      for idx, gui_builder in enumerate(gui_builders):
+        builders[f"{path}/{idx}"] = gui_builder
+
+    def build_index()->"gr.Blocks":
+      with gr.Blocks() as index:
+        gr.Markdown("\n".join(
+          f"- [{path}](.{path}/)" for path in builders
+        ))
+        self.gr_info
+      return index
+    builders[""] = build_index
+
+    return LazyGradioMount(builders, idle_timeout=idle_timeout)
   
   @property
-  def gr_info(self)->gr.DataFrame:
-    
+  def gr_info(self)->"gr.DataFrame":
+    import gradio as gr
+    import pandas as pd
+
     info_list = self.get_info().info
     df_data = [
       {
         "prefix":I.prefix,
-        "uri":I.uri,
+        "uri":I.uri if isinstance(I.uri, str) else ", ".join(I.uri),
         "API Loaded": {
           True:"Success",
           False:"Fail",
@@ -183,8 +637,10 @@ class Aggregator(APIRouter):
         "GUI Loaded": {
           True:"Success",
           False:"Fail",
+          None:self.gui_mode,
         }[I.status.gui_success],
         "APIS":f"""({I.num_of_apis}) [{", ".join(I.api_names)}]""",
+        "API Build Seconds":I.timings.api_building_seconds,
       }
       for I in info_list
     ]
@@ -198,6 +654,30 @@ class Server(TypedDict):
   uri: str
   prefix: str
 
+def snapshot_servers(
+  servers: list[Server],
+  snapshot_dir:str,
+  max_parallel_builds:int=8,
+):
+  # introspect every upstream once, so worker processes build their routes from the snapshots
+  snapshot_store = SnapshotStore(snapshot_dir)
+  uris = list({
+    canonical_uri(uri): uri
+    for uri in (S["uri"] if isinstance(S["uri"], str) else S["uri"][0] for S in servers)
+  }.values())
+  def _save(uri:str):
+    try:
+      save_snapshot(uri, snapshot_store)
+    except Exception as e:
+      # the workers introspect this upstream themselves
+      print("[SKIP ERROR]", uri, e)
+
+  with ThreadPoolExecutor(
+    max_workers=max(1, max_parallel_builds),
+    thread_name_prefix="gradio2api-snapshot",
+  ) as executor:
+    list(executor.map(_save, uris))
+
 
 def create_gradio2api(
   servers: list[Server],
@@ -205,6 +685,18 @@ def create_gradio2api(
   gradio_client_config_path :str = None,
   error_allowed=True,
   mounting_point="/gradio",
+  max_parallel_builds:int=8,
+  build_timeout:float | None=None,
+  snapshot_dir:str | None=None,
+  revalidate_snapshots:bool=True,
+  gui_mode:GUI_MODE="eager",
+  gui_idle_timeout:float | None=None,
+  admin_token:str | None=None,
+  output_dir:str | None=None,
+  output_max_bytes:int | None=OutputStoreConfig().max_bytes,
+  output_ttl:float | None=OutputStoreConfig().ttl,
+  max_inflight:int | None=None,
+  admission:dict[str, dict] | None=None, # prefix -> AdmissionConfig fields
 ):
 
   remote_servers_config_list = []
@@ -223,15 +715,43 @@ def create_gradio2api(
       for orginal_config in remote_servers_config_list
     ]
 
+  admission = admission or {}
+  remote_servers_config_list = [
+    {
+      **config,
+      "admission": admission[config["prefix"]],
+    } if config["prefix"] in admission else config
+    for config in remote_servers_config_list
+  ]
+
   aggregator_router = Aggregator(
     remote_servers_config_list,
-    error_allowed_api=error_allowed
+    error_allowed_api=error_allowed,
+    max_parallel_builds=max_parallel_builds,
+    build_timeout=build_timeout,
+    snapshot_dir=snapshot_dir,
+    revalidate_snapshots=revalidate_snapshots,
+    gui_mode=gui_mode,
+    admin_token=admin_token,
+    max_inflight=max_inflight,
+    output_store=OutputStoreConfig(
+      root=output_dir,
+      max_bytes=output_max_bytes,
+      ttl=output_ttl,
+    ) if output_dir else None,
   )
   app = FastAPI()
   app.include_router(aggregator_router)
-  app = gr.mount_gradio_app(
-    app,
-    aggregator_router.grand_gr_app,
-    mounting_point,
-  )
+  if gui_mode == "eager":
+    import gradio as gr
+    app = gr.mount_gradio_app(
+      app,
+      aggregator_router.grand_gr_app,
+      mounting_point,
+    )
+  elif gui_mode == "lazy":
+    app.mount(
+      mounting_point,
+      aggregator_router.lazy_gr_app(idle_timeout=gui_idle_timeout),
+    )
   return app
\ No newline at end of file
@@ -0,0 +1,185 @@
+from gradio_client import utils as gr_client_utils
+from gradio_client.exceptions import AppError
+from gradio_client.utils import Status, StatusUpdate
+from concurrent.futures import Future, InvalidStateError
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+import threading
+import hashlib
+import asyncio
+import shutil
+import uuid
+import os
+
+if TYPE_CHECKING:
+  import gradio as gr
+
+class DirectJob(Future):
+  # the subset of gradio_client.Job used by gradio2api, outputs of generators are iterable
+  def __init__(self):
+    super().__init__()
+    self.__outputs: list = []
+    self.__updated = threading.Condition()
+    self._task: asyncio.Task | None = None
+
+  def _push(self, output):
+    with self.__updated:
+      self.__outputs.append(output)
+      self.__updated.notify_all()
+
+  def _finish(self, result:Any = None, exc:BaseException | None = None):
+    try:
+      if exc is None:
+        self.set_result(result)
+      else:
+        self.set_exception(exc)
+    except InvalidStateError:
+      pass # cancelled meanwhile
+    with self.__updated:
+      self.__updated.notify_all()
+
+  def outputs(self)->list:
+    with self.__updated:
+      return list(self.__outputs)
+
+  def __iter__(self):
+    index = 0
+    while True:
+      with self.__updated:
+        self.__updated.wait_for(lambda: len(self.__outputs) > index or self.done())
+        if len(self.__outputs) <= index:
+          return
+        output = self.__outputs[index]
+      index += 1
+      yield output
+
+  def cancel(self)->bool:
+    task = self._task
+    if task is not None:
+      task.get_loop().call_soon_threadsafe(task.cancel)
+    cancelled = super().cancel()
+    with self.__updated:
+      self.__updated.notify_all()
+    return cancelled
+
+  def status(self)->StatusUpdate:
+    return StatusUpdate(
+      code=Status.FINISHED if self.done() else Status.PROCESSING,
+      rank=None,
+      queue_size=None,
+      eta=None,
+      success=None if not self.done() else not self.cancelled() and self.exception() is None,
+      time=datetime.now(),
+      progress_data=None,
+    )
+
+# calls the registered functions of an unlaunched gr.Blocks in this process,
+# a drop in for the gradio_client.Client of a launched local app
+class DirectClient:
+  def __init__(self, blocks:"gr.Blocks", download_files:str | None = None):
+    self.blocks = blocks
+    self.download_files = download_files # file outputs are copied here, they stay in the gradio cache otherwise
+    self.api_info = blocks.get_api_info()
+    self.fns = {
+      f"/{fn.api_name}": fn
+      for fn in blocks.fns.values()
+      if fn.api_name
+    }
+    # gradio's process_api is async, it runs on a loop of its own
+    self.__loop = asyncio.new_event_loop()
+    threading.Thread(
+      target=self.__loop.run_forever,
+      name="gradio2api-direct",
+      daemon=True,
+    ).start()
+
+  def view_api(self, print_info:bool = True, return_format:str | None = None):
+    if print_info:
+      print(self.api_info)
+    if return_format == "dict":
+      return self.api_info
+
+  def _inputs(self, fn, api_name:str, args:tuple, kwargs:dict)->list:
+    values = iter(gr_client_utils.construct_args(
+      self.api_info["named_endpoints"][api_name]["parameters"], args, kwargs,
+    ))
+    # state inputs are not part of the api, gradio_client sends None for them as well
+    inputs = [None if block.skip_api else next(values) for block in fn.inputs]
+    if fn.batch:
+      inputs = [[value] for value in inputs]
+    return inputs
+
+  def _outputs(self, fn, data:list):
+    if fn.batch:
+      data = [value[0] for value in data]
+    data = [
+      gr_client_utils.traverse(value, self._to_path, gr_client_utils.is_file_obj)
+      for value, block in zip(data, fn.outputs)
+      if not block.skip_api
+    ]
+    return data[0] if len(data) == 1 else tuple(data)
+
+  def _to_path(self, file_data:dict)->str:
+    path = file_data["path"]
+    if self.download_files is None:
+      return path
+    # content addressed like gradio_client downloads, a repeated output is stored once
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+      while chunk := f.read(1 << 20):
+        sha256.update(chunk)
+    directory = os.path.join(self.download_files, sha256.hexdigest())
+    target = os.path.join(directory, os.path.basename(path))
+    if not os.path.exists(target):
+      os.makedirs(directory, exist_ok=True)
+      tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+      shutil.copyfile(path, tmp_path)
+      os.replace(tmp_path, target)
+    return target
+
+  async def _run(self, job:DirectJob, fn, inputs:list):
+    from gradio.state_holder import SessionState
+    state = SessionState(self.blocks)
+    # without a session_hash gradio keeps no diff or stream bookkeeping, every output is whole
+    output = await self.blocks.process_api(
+      block_fn=fn,
+      inputs=inputs,
+      state=state,
+      explicit_call=True,
+    )
+    result = self._outputs(fn, output["data"])
+    while output["is_generating"]:
+      job._push(result)
+      output = await self.blocks.process_api(
+        block_fn=fn,
+        inputs=[],
+        state=state,
+        iterator=output["iterator"],
+        explicit_call=True,
+      )
+      if output["is_generating"]:
+        result = self._outputs(fn, output["data"])
+    return result # a generator ends with its last output, like gradio_client
+
+  def submit(self, *args, api_name:str, **kwargs)->DirectJob:
+    fn = self.fns[api_name]
+    inputs = self._inputs(fn, api_name, args, kwargs)
+    job = DirectJob()
+
+    async def _main():
+      job._task = asyncio.current_task()
+      if job.cancelled():
+        return
+      try:
+        job._finish(await self._run(job, fn, inputs))
+      except asyncio.CancelledError:
+        job._finish(exc=asyncio.CancelledError())
+      except Exception as e:
+        # the function failed, not the transport, same as an upstream AppError
+        job._finish(exc=AppError(str(e) or repr(e)))
+
+    asyncio.run_coroutine_threadsafe(_main(), self.__loop)
+    return job
+
+  def predict(self, *args, api_name:str, **kwargs):
+    return self.submit(*args, api_name=api_name, **kwargs).result()
@@ -0,0 +1,94 @@
+from pydantic import BaseModel, TypeAdapter
+from fastapi import Request, Response
+from typing import Any, Literal, Optional
+import gzip
+
+# optional, pip install gradio2api[fast]
+try:
+  import orjson
+except ImportError:
+  orjson = None
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+COMPRESSION = Literal["zstd", "gzip"]
+
+_ANY_ADAPTER = TypeAdapter(Any)
+
+class EncodingConfig(BaseModel):
+  msgpack: bool = True # MessagePack when Accept asks for it and msgpack is installed
+  compress_min_bytes: Optional[int] = 1024 # smaller bodies are sent as they are, None never compresses
+  compression: list[COMPRESSION] = ["zstd", "gzip"] # preference when the client accepts several
+  gzip_level: int = 5
+  zstd_level: int = 3
+
+def parse_accept(header:str | None)->dict[str, float]:
+  accepted = {}
+  for part in (header or "").split(","):
+    value, *params = [token.strip() for token in part.split(";")]
+    if not value:
+      continue
+    q = 1.0
+    for param in params:
+      if param.startswith("q="):
+        try:
+          q = float(param[2:])
+        except ValueError:
+          q = 0.0
+    accepted[value.lower()] = q
+  return accepted
+
+def negotiate_media_type(accept:str | None, config:EncodingConfig)->str:
+  accepted = parse_accept(accept)
+  if config.msgpack and msgpack is not None:
+    msgpack_q = max((accepted.get(media_type, 0.0) for media_type in MSGPACK_TYPES), default=0.0)
+    if msgpack_q > 0 and msgpack_q >= accepted.get(JSON, 0.0):
+      return MSGPACK
+  return JSON
+
+def negotiate_compression(accept_encoding:str | None, config:EncodingConfig)->COMPRESSION | None:
+  accepted = parse_accept(accept_encoding)
+  for coding in config.compression:
+    if coding == "zstd" and zstandard is None:
+      continue
+    if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+      return coding
+  return None
+
+def encode(content:Any, media_type:str)->bytes:
+  # content is already json compatible, no jsonable_encoder walk
+  if media_type == MSGPACK:
+    return msgpack.packb(content)
+  if orjson is not None:
+    return orjson.dumps(content)
+  return _ANY_ADAPTER.dump_json(content)
+
+def compress(body:bytes, coding:COMPRESSION, config:EncodingConfig)->bytes:
+  if coding == "zstd":
+    return zstandard.ZstdCompressor(level=config.zstd_level).compress(body)
+  return gzip.compress(body, compresslevel=config.gzip_level)
+
+def encode_response(
+    content:Any,
+    request:Request,
+    config:EncodingConfig,
+    status_code:int = 200,
+  )->Response:
+  media_type = negotiate_media_type(request.headers.get("accept"), config)
+  body = encode(content, media_type)
+  headers = {"Vary": "Accept, Accept-Encoding"}
+  if config.compress_min_bytes is not None and len(body) >= config.compress_min_bytes:
+    coding = negotiate_compression(request.headers.get("accept-encoding"), config)
+    if coding is not None:
+      body = compress(body, coding, config)
+      headers["Content-Encoding"] = coding
+  return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
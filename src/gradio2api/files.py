@@ -0,0 +1,78 @@
+from typing import Callable, Literal
+from collections import OrderedDict
+from gradio_client.client import DEFAULT_TEMP_DIR as GR_DEFAULT_TEMP_DIR
+from starlette.datastructures import UploadFile
+from .utils.hash import _make_hash
+import tempfile
+import shutil
+import os
+
+FILE_OUTPUT = Literal["path", "url"]
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# output files downloaded by gradio_client, served back to API users by token
+class FileRegistry:
+  roots: list[str]
+
+  def __init__(self, roots:list[str] | None = None, max_files:int = 65536):
+    self.roots = [os.path.realpath(root) for root in (roots or [GR_DEFAULT_TEMP_DIR])]
+    self.max_files = max_files
+    self.__files: OrderedDict[str, str] = OrderedDict()
+
+  def _is_servable(self, path:str)->bool:
+    if not os.path.isfile(path):
+      return False
+    real_path = os.path.realpath(path)
+    return any(
+      os.path.commonpath([real_path, root]) == root
+      for root in self.roots
+    )
+
+  def register(self, path:str)->str:
+    token = _make_hash(os.path.realpath(path))
+    self.__files[token] = path
+    self.__files.move_to_end(token)
+    while len(self.__files) > self.max_files:
+      self.__files.popitem(last=False)
+    return token
+
+  def resolve(self, token:str)->str | None:
+    path = self.__files.get(token)
+    if path is None or not os.path.isfile(path):
+      return None
+    return path
+
+  def publish(self, value, url_for:Callable[[str, str], str]):
+    # replace local output paths with urls served by the aggregator
+    if isinstance(value, str):
+      if not self._is_servable(value):
+        return value
+      return url_for(self.register(value), os.path.basename(value))
+    if isinstance(value, dict):
+      return {k: self.publish(v, url_for) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+      return type(value)(self.publish(v, url_for) for v in value)
+    return value
+
+def spool_upload(upload:UploadFile)->str:
+  # copy in chunks, so a large upload never sits in memory as a whole;
+  # the original file name is kept since the upstream sees it
+  directory = tempfile.mkdtemp(prefix="gradio2api-")
+  path = os.path.join(directory, os.path.basename(upload.filename or "") or "upload")
+  upload.file.seek(0)
+  with open(path, "wb") as f:
+    shutil.copyfileobj(upload.file, f, UPLOAD_CHUNK_SIZE)
+  return path
+
+def remove_upload(path:str):
+  shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+def resolve_uploads(payload, uploads:dict[str, str]):
+  # {"upload": "<multipart field>"} references become local paths
+  if isinstance(payload, dict):
+    if set(payload.keys()) == {"upload"}:
+      return {"path": uploads[payload["upload"]]}
+    return {k: resolve_uploads(v, uploads) for k, v in payload.items()}
+  if isinstance(payload, list):
+    return [resolve_uploads(v, uploads) for v in payload]
+  return payload
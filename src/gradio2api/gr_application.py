@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from pydantic.main import create_model
-from typing import Any, TypedDict, Callable, Literal, _LiteralGenericAlias
+from typing import TYPE_CHECKING, Any, TypedDict, Callable, Literal, _LiteralGenericAlias
 from types import EllipsisType
 
 from typing_extensions import Optional, Any
@@ -12,21 +12,71 @@ from gradio_client.utils import (
   sanitize_parameter_names,
   sanitize_parameter_names as sanitize_return_names,
 )
-import gradio as gr
-from gradio import utils as gr_utils
-from gradio.data_classes import JsonData
 
 from .gr_types import LOWER_PARAMETER_TYPES, LOWER_RETURN_TYPES
 from .gr_types.models_parameters import FILE as FILE_INPUT
 from copy import deepcopy
 from .utils.names import prefix_to_name
 from .utils.gr_client_utils import LoadGradioClient
-from gradio.exceptions import (
-    GradioVersionIncompatibleError,
-)
+from .utils.snapshot import Snapshot, SnapshotStore, schema_hash
+from .utils.upstream import UpstreamRegistry, canonical_uri, upstream_key
+from .client_pool import ClientPool, LOAD_BALANCE_STRATEGY
+from .batching import BatchConfig, MicroBatcher
+from .cache import ResultCache, CacheConfig, MISS
+from .utils.hash import make_input_key, has_file_data
+from .utils.singleflight import SingleFlight
+from .output_store import OutputStore
+from .metrics import EndpointMetrics
+from .breaker import BreakerConfig, CircuitBreaker, UpstreamTimeout, job_exception
+from .admission import PrefixAdmission
+from .direct import DirectClient
 from packaging import version
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError, wait as wait_futures
+from types import MappingProxyType
+from collections.abc import Mapping
 
+import asyncio
 import functools
+import threading
+import weakref
+import json
+import time
+import os
+
+if TYPE_CHECKING: # gradio is only imported to build GUIs
+  import gradio as gr
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GRADIO2API_MAX_CONCURRENCY", 8))
+
+def make_executor(max_concurrency:int | None = None)->ThreadPoolExecutor:
+  return ThreadPoolExecutor(
+    max_workers=max_concurrency or DEFAULT_MAX_CONCURRENCY,
+    thread_name_prefix="gradio2api",
+  )
+
+_STREAM_END = object()
+
+# strict: every payload is validated at every step, the default
+# lax: validated once, requests by FastAPI and upstream outputs by a prebuilt adapter
+# trusted: upstream outputs are serialized as they are, without validation
+VALIDATION_MODE = Literal["strict", "lax", "trusted"]
+
+_ANY_ADAPTER = TypeAdapter(Any)
+
+def _has_file_fields(annotation)->bool:
+  if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+    return hasattr(annotation, "to_handle_file") or any(
+      _has_file_fields(field.annotation)
+      for field in annotation.model_fields.values()
+    )
+  return any(_has_file_fields(arg) for arg in getattr(annotation, "__args__", ()))
+
+def named_dependencies(config:dict)->dict[str, dict]:
+  return {
+    f"/{dependency['api_name']}": dependency
+    for dependency in config.get("dependencies", [])
+    if dependency.get("api_name")
+  }
 
 class IgnoreModel(BaseModel):
   model_config = ConfigDict(extra="ignore")
@@ -67,7 +117,7 @@ class BaseField:
       config:PartReturn | PartParameter,
       allow_not_in_reference=True,
     ):
-    self.config = deepcopy(config)
+    self.config = config # never mutated, models are built from it once
     self.allow_not_in_reference = allow_not_in_reference
     self.preprocess()
     self.__enumwise_annotation()
@@ -164,7 +214,7 @@ class ReturnField(BaseField):
     self.default = ...
     self.description = self._config_dict.get("python_type", {}).get("description", "")
 
-ACCEPT_FIELD_TYPE = ReturnField | ParameterField | PartReturn | PartParameter | dict
+ACCEPT_FIELD_TYPE = ReturnField | ParameterField | PartReturn | PartParameter | Mapping
 class MultipleFields:
   def __init__(
       self,
@@ -184,6 +234,7 @@ class MultipleFields:
   def normalize_field(cls, field:ACCEPT_FIELD_TYPE):
     do_nothing = lambda elem: elem
     def dict_to_field(D):
+      D = _thaw(D) # interned schemas are read-only mappings
       IS_PARAMETER = D.get("parameter_name", False)
       IS_RETURN = IS_PARAMETER == False
       if IS_PARAMETER:
@@ -202,7 +253,7 @@ class MultipleFields:
       PartReturn: ReturnField,
       PartParameter: ParameterField,
       dict: dict_to_field
-    }[type(field)](field)
+    }[dict if isinstance(field, Mapping) else type(field)](field)
 
     return return_field
   
@@ -220,19 +271,129 @@ class MultipleFields:
       **fields_dict,
     )
 
+def _freeze(x):
+  if isinstance(x, dict):
+    return MappingProxyType({key: _freeze(value) for key, value in x.items()})
+  if isinstance(x, list):
+    return tuple(_freeze(value) for value in x)
+  return x
+
+def _thaw(x):
+  if isinstance(x, MappingProxyType):
+    return {key: _thaw(value) for key, value in x.items()}
+  if isinstance(x, tuple):
+    return [_thaw(value) for value in x]
+  return x
+
+# the read-only schema of an endpoint, interned by content: identical endpoints,
+# under any prefix or upstream uri, share one schema and one set of models
+class EndpointSchema:
+  api_name: str
+  hash: str
+  config: MappingProxyType
+  _interned: "weakref.WeakValueDictionary[str, EndpointSchema]" = weakref.WeakValueDictionary()
+  _lock = threading.Lock()
+
+  def __init__(self, api_name:str, config_dict:dict, hash:str):
+    self.api_name = api_name
+    self.hash = hash
+    self.config = _freeze(config_dict)
+    self.return_names = tuple(sanitize_return_names(R["label"]) for R in config_dict["returns"])
+
+  @classmethod
+  def intern(cls, api_name:str, config_dict:dict)->"EndpointSchema":
+    key = schema_hash({"api_name": api_name, **config_dict})
+    with cls._lock:
+      schema = cls._interned.get(key)
+      if schema is None:
+        schema = cls._interned[key] = cls(api_name, config_dict, key)
+    return schema
+
+  @classmethod
+  def interned(cls)->int:
+    return len(cls._interned)
+
+  @property
+  def parameters(self)->tuple:
+    return self.config["parameters"]
+
+  @property
+  def returns(self)->tuple:
+    return self.config["returns"]
+
+  def to_dict(self)->dict:
+    return _thaw(self.config)
+
+  @functools.cached_property
+  def parameter_model(self)->type[BaseModel]:
+    return (
+      MultipleFields(self.parameters)
+      .to_pydantic_model(f"{self.api_name.replace('/','_')}_parameter")
+    )
+
+  @functools.cached_property
+  def return_model(self)->type[BaseModel]:
+    return (
+      MultipleFields(self.returns)
+      .to_pydantic_model(f"{self.api_name.replace('/','_')}_return")
+    )
+
+  # reusable validators and serializers, nothing is constructed per call
+  @functools.cached_property
+  def parameter_adapter(self)->TypeAdapter:
+    return TypeAdapter(self.parameter_model)
+
+  @functools.cached_property
+  def return_adapter(self)->TypeAdapter:
+    return TypeAdapter(self.return_model)
+
+  @functools.cached_property
+  def has_file_parameters(self)->bool:
+    return _has_file_fields(self.parameter_model)
+
+class PendingClient:
+  # the client of an upstream served from a snapshot, resolved through its latest connection attempt
+  def __init__(self, upstream:"Upstream"):
+    self.upstream = upstream
+
+  def result(self)->ClientPool:
+    return self.upstream.client
+
 class GradioAPI:
   def __init__(
     self,
     api_name:str,
     config_dict:dict,
     *,
-    client:Client | None = None,
-    app:gr.Blocks | None = None,
+    client:Client | ClientPool | Future | PendingClient | None = None, # a Future resolves on first use
+    app:"gr.Blocks | None" = None,
+    executor:ThreadPoolExecutor | None = None,
+    dependency:dict | None = None,
+    batching:BatchConfig | None = None,
+    cache:ResultCache | None = None,
+    single_flight:bool | list[str] = False, # True for every endpoint, or a list of api names
+    breaker:CircuitBreaker | None = None, # shared by every endpoint of the upstream
+    validation:VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict", # a dict sets it per api name
   ):
     self.api_name = api_name
-    self.__config_dict = deepcopy(config_dict)
-    self.parameters = deepcopy(config_dict["parameters"])
-    self.returns = deepcopy(config_dict["returns"])
+    self.validation: VALIDATION_MODE = (
+      validation.get(api_name, "strict") if isinstance(validation, dict) else validation
+    )
+    self.executor = executor
+    self.dependency = dependency or {}
+    self.cache = cache
+    self.breaker = breaker
+    self.metrics: EndpointMetrics | None = None # attached by the router serving this endpoint
+    self.admission: PrefixAdmission | None = None # attached by the router as well
+    self.running_jobs = 0 # /jobs submissions still waiting for or holding a slot
+    self.single_flight = None
+    if single_flight is True or (
+      isinstance(single_flight, list) and api_name in single_flight
+    ):
+      self.single_flight = SingleFlight()
+    self.schema = EndpointSchema.intern(api_name, config_dict)
+    self.parameters = self.schema.parameters
+    self.returns = self.schema.returns
 
     assert not (
       (client != None)
@@ -245,6 +406,26 @@ class GradioAPI:
     if self.__app:
       self.__client = LoadGradioClient(self.__app.local_url)
 
+    self.batcher = None
+    if batching and (
+      self.api_name in batching.api_names
+      if batching.api_names is not None else self.is_batched
+    ):
+      self.batcher = MicroBatcher(
+        self._submit,
+        max_batch_size=batching.max_batch_size or self.dependency.get("max_batch_size", 4),
+        max_wait=batching.max_wait_ms / 1000,
+        executor=self.executor,
+      )
+
+  @property
+  def is_batched(self)->bool:
+    return bool(self.dependency.get("batch", False))
+
+  @property
+  def is_generator(self)->bool:
+    return bool(self.dependency.get("types", {}).get("generator", False))
+
   def __verify_in_gr_client(self):
     assert self.client is not None
     assert self.api_name in self.view_api(
@@ -261,37 +442,69 @@ class GradioAPI:
 
   @property
   def client(self)->Client:
+    if isinstance(self.__client, (Future, PendingClient)):
+      return self.__client.result()
     return self.__client
   
   @property
-  def app(self)->gr.Blocks:
+  def app(self)->"gr.Blocks":
     return self.__app
 
   @property
   def config_dict(self):
-    return deepcopy(self.__config_dict)
+    return self.schema.to_dict()
 
+  # built once per schema, shared with every endpoint of the same schema
   @property
   def parameter_model(self)->type[BaseModel]:
-    return (
-      MultipleFields(self.parameters)
-      .to_pydantic_model(f"{self.normalized_api_name}_parameter")
-    )
+    return self.schema.parameter_model
 
   @property
   def return_model(self)->type[BaseModel]:
-    return (
-      MultipleFields(self.returns)
-      .to_pydantic_model(f"{self.normalized_api_name}_return")
-    )
+    return self.schema.return_model
+
+  @property
+  def parameter_adapter(self)->TypeAdapter:
+    return self.schema.parameter_adapter
+
+  @property
+  def return_adapter(self)->TypeAdapter:
+    return self.schema.return_adapter
+
+  @property
+  def has_file_parameters(self)->bool:
+    return self.schema.has_file_parameters
+
+  def dump_output(self, output:BaseModel, mode:Literal["python", "json"]="json"):
+    # a trusted output may not match its model, serialize what is there
+    if self.validation == "trusted":
+      return _ANY_ADAPTER.dump_python(output.__dict__, mode=mode)
+    return self.return_adapter.dump_python(output, mode=mode)
+
+  def dump_output_json(self, output:BaseModel)->bytes:
+    if self.validation == "trusted":
+      return _ANY_ADAPTER.dump_json(output.__dict__)
+    return self.return_adapter.dump_json(output)
 
   @property
   def normalized_api_name(self):
     return self.api_name.replace("/","_")
 
   def normalize_input(self, item)->dict: # will return dict
+    if self.metrics is None:
+      return self._normalize_input(item)
+    start = time.perf_counter()
+    try:
+      return self._normalize_input(item)
+    finally:
+      self.metrics.observe_stage("normalize_input", start)
+
+  def _normalize_input(self, item)->dict:
     if type(item) is dict:
-      item = self.parameter_model(**item)
+      item = self.parameter_adapter.validate_python(item)
+    if self.validation != "strict" and not self.has_file_parameters:
+      # nothing to convert for gradio_client, one pass in pydantic-core
+      return item.model_dump()
 
     # TODO: handling file trasfer between gradio and fastapi
     def dfs_helper(item):
@@ -309,22 +522,66 @@ class GradioAPI:
     return dfs_helper(item)
 
   def normalize_output(self, gr_result:list): # will return self.retun_model type
-    D = {
-      sanitize_return_names(R["label"]): field_result
-      for R, field_result in zip(self.returns, gr_result)
-    }
-    return self.return_model(**D)
-
-  def predict(self, item, return_fomat:Literal["list", "dict"]="dict"):
-    assert self.client is not None
-    item = self.normalize_input(item)
-
-    gr_client : Client = self.client
-
-    gr_result = gr_client.predict(
+    if self.metrics is None:
+      return self._normalize_output(gr_result)
+    start = time.perf_counter()
+    try:
+      return self._normalize_output(gr_result)
+    finally:
+      self.metrics.observe_stage("normalize_output", start)
+
+  def _normalize_output(self, gr_result:list):
+    D = dict(zip(self.schema.return_names, gr_result))
+    if self.validation == "trusted":
+      return self.return_model.model_construct(**D)
+    return self.return_adapter.validate_python(D)
+
+  def _submit(self, item:dict):
+    return self.client.submit(
       **item,
       api_name=self.api_name,
     )
+
+  def submit_job(self, item):
+    assert self.client is not None
+    item = self.normalize_input(item)
+    if self.breaker is None:
+      return self._submit(item)
+
+    self.breaker.before_call()
+    start = time.perf_counter()
+    try:
+      job = self._submit(item)
+    except Exception as e:
+      self.breaker.record(self.api_name, time.perf_counter() - start, e, observe=False)
+      raise
+    job.add_done_callback(lambda job: self.breaker.record(
+      self.api_name, time.perf_counter() - start, job_exception(job), observe=False,
+    ))
+    return job
+
+  async def arun_job(self, item, on_submit:Callable[[Future], None]):
+    # a job holds its admission slot and a worker until the upstream finishes,
+    # like any other call
+    self.running_jobs += 1
+    try:
+      if self.admission is None:
+        return await self._arun_job(item, on_submit)
+      async with self.admission.slot(self.api_name):
+        return await self._arun_job(item, on_submit)
+    finally:
+      self.running_jobs -= 1
+
+  async def _arun_job(self, item, on_submit:Callable[[Future], None]):
+    def _run():
+      job = self.submit_job(item)
+      on_submit(job)
+      wait_futures([job])
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(self.executor, _run)
+
+  def _format_result(self, gr_result, return_fomat:Literal["list", "dict"]="dict"):
     ONLY_1_OUTPUT = len(self.returns) == 1
     if ONLY_1_OUTPUT:
       gr_result = [gr_result]
@@ -336,6 +593,162 @@ class GradioAPI:
     else:
       raise ValueError
 
+  def predict(self, item, return_fomat:Literal["list", "dict"]="dict"):
+    assert self.client is not None
+    item = self.normalize_input(item)
+
+    gr_client : Client = self.client
+
+    gr_result = gr_client.predict(
+      **item,
+      api_name=self.api_name,
+    )
+    return self._format_result(gr_result, return_fomat)
+
+  async def _asubmit(self, item:dict):
+    # cache hits and single-flight followers never take an admission slot
+    if self.admission is None:
+      return await self._aguarded(item)
+    async with self.admission.slot(self.api_name):
+      return await self._aguarded(item)
+
+  async def _aguarded(self, item:dict):
+    if self.breaker is None:
+      return await self._aupstream(item)
+    with self.breaker.guard(self.api_name):
+      return await self._aupstream(item, timeout=self.breaker.timeout_for(self.api_name))
+
+  async def _aupstream(self, item:dict, timeout:float | None = None):
+    if self.batcher is not None:
+      start = time.perf_counter()
+      try:
+        # on a timeout the batcher cancels the upstream job of the item as well
+        gr_result = await asyncio.wait_for(self.batcher.submit(item), timeout)
+      except asyncio.TimeoutError:
+        raise UpstreamTimeout(f"{self.api_name} took longer than {timeout:.1f}s")
+      if self.metrics is not None:
+        self.metrics.observe_stage("upstream", start)
+      return gr_result
+
+    def _predict():
+      started = time.perf_counter()
+      job = self._submit(item)
+      try:
+        return started, job.result(timeout=timeout)
+      except FutureTimeoutError:
+        # frees the worker, a queued upstream job is dropped as well
+        job.cancel()
+        raise UpstreamTimeout(f"{self.api_name} took longer than {timeout:.1f}s")
+
+    # blocking gradio_client calls run in the application's bounded pool,
+    # so a slow upstream never stalls the event loop
+    loop = asyncio.get_running_loop()
+    enqueued = time.perf_counter()
+    started, gr_result = await loop.run_in_executor(self.executor, _predict)
+    if self.metrics is not None:
+      self.metrics.queue_wait.observe(started - enqueued)
+      self.metrics.observe_stage("upstream", started)
+    return gr_result
+
+  async def _acached_submit(self, item:dict, cache_control:str | None = None):
+    if self.cache is None and self.single_flight is None:
+      return await self._asubmit(item)
+
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    read = "no-cache" not in directives and "no-store" not in directives
+    write = "no-store" not in directives
+
+    if has_file_data(item):
+      # input files are hashed by content
+      key = await asyncio.get_running_loop().run_in_executor(None, make_input_key, self.api_name, item)
+    else:
+      key = make_input_key(self.api_name, item)
+    if self.cache is not None:
+      if not read:
+        self.cache.stats.bypasses += 1
+      elif (gr_result := await self.cache.aget(key)) is not MISS:
+        return gr_result
+
+    async def _fetch():
+      gr_result = await self._asubmit(item)
+      if write and self.cache is not None:
+        await self.cache.aset(key, gr_result)
+      return gr_result
+
+    if self.single_flight is None:
+      return await _fetch()
+    return await self.single_flight.do(key, _fetch)
+
+  async def apredict(
+      self,
+      item,
+      return_fomat:Literal["list", "dict"]="dict",
+      cache_control:str | None = None, # Cache-Control request header
+    ):
+    # the client may still be connecting, it is resolved in the executor
+    assert self.__client is not None
+    item = self.normalize_input(item)
+    gr_result = await self._acached_submit(item, cache_control)
+    return self._format_result(gr_result, return_fomat)
+
+  async def astream(self, item, return_fomat:Literal["list", "dict"]="dict"):
+    # a stream holds its admission slot until the last output
+    if self.admission is None:
+      async for output in self._aguarded_stream(item, return_fomat):
+        yield output
+      return
+    async with self.admission.slot(self.api_name):
+      async for output in self._aguarded_stream(item, return_fomat):
+        yield output
+
+  async def _aguarded_stream(self, item, return_fomat:Literal["list", "dict"]="dict"):
+    if self.breaker is None:
+      async for output in self._astream(item, return_fomat):
+        yield output
+      return
+    # streams take as long as they produce, their latency never shapes the timeout
+    with self.breaker.guard(self.api_name, observe=False):
+      async for output in self._astream(item, return_fomat):
+        yield output
+
+  async def _astream(self, item, return_fomat:Literal["list", "dict"]="dict"):
+    # submit and iterate the gradio_client job in the worker pool, hand each output to the loop
+    assert self.__client is not None
+    item = self.normalize_input(item)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    jobs = []
+    stopped = threading.Event()
+
+    def _iterate():
+      try:
+        job = self._submit(item)
+        jobs.append(job)
+        if stopped.is_set(): # the consumer left while submitting
+          job.cancel()
+          return
+        for output in job:
+          loop.call_soon_threadsafe(queue.put_nowait, (output, None))
+        job.result()
+        loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, None))
+      except Exception as e:
+        loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+
+    loop.run_in_executor(self.executor, _iterate)
+    try:
+      while True:
+        output, exc = await queue.get()
+        if exc is not None:
+          raise exc
+        if output is _STREAM_END:
+          return
+        yield self._format_result(output, return_fomat)
+    finally:
+      stopped.set()
+      for job in jobs:
+        if not job.done():
+          job.cancel()
+
   def __repr__(self) -> str:
     return "\n\n".join([
       Client._render_endpoints_info(
@@ -348,20 +761,59 @@ class GradioAPI:
   def __call__(self, item):
     return self.predict(item)
 
+def save_snapshot(src:str, snapshot_store:SnapshotStore, **gr_client_kwargs)->Snapshot:
+  # introspect an upstream without building its routes
+  client = LoadGradioClient(src, **gr_client_kwargs)
+  return snapshot_store.save(
+    canonical_uri(src),
+    client_info_dict=client.view_api(print_info=False, return_format="dict"),
+    client_docuemnt=client.view_api(print_info=False, return_format="str"),
+    config=client.config,
+  )
+
 class LocalGradioApplication:
-  app:gr.Blocks
+  app:"gr.Blocks"
   api_info:dict
   apis:dict[str, GradioAPI]
 
   def __init__(
     self,
-    app:gr.Blocks,
+    app:"gr.Blocks",
+    max_concurrency:int | None = None,
+    batching:BatchConfig | None = None,
+    cache:CacheConfig | None = None,
+    single_flight:bool | list[str] = False,
+    output_store:OutputStore | None = None,
+    breaker:BreakerConfig | None = None,
+    validation:VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict",
+    direct:bool = False, # call the functions in process instead of through a launched server
   ):
     self.app = app
-    if not app.is_running:
-      self.app.launch(prevent_thread_lock=True)
+    self.executor = make_executor(max_concurrency)
+    self.batching = batching
+    self.cache = cache
+    self.single_flight = single_flight
+    self.validation = validation
+    self.output_store = output_store
+    self.breaker = CircuitBreaker(breaker) if breaker else None
+    self.direct = direct
+    if direct:
+      self.src = f"direct://{id(app)}"
+      self.client = DirectClient(
+        app,
+        download_files=output_store.download_dir(self.src) if output_store is not None else None,
+      )
+    else:
+      if not app.is_running:
+        self.app.launch(prevent_thread_lock=True)
+      self.src = self.app.local_url
+      gr_client_kwargs = {}
+      if output_store is not None:
+        gr_client_kwargs["download_files"] = output_store.download_dir(self.src)
+      self.client = LoadGradioClient(self.src, **gr_client_kwargs)
 
     self.api_info = app.get_api_info()
+    self.dependencies = named_dependencies(app.config)
     self._prepare_api()
 
   def _prepare_api(self):
@@ -369,7 +821,14 @@ class LocalGradioApplication:
       api_name:GradioAPI(
         api_name=api_name,
         config_dict=config_dict,
-        app=self.app,
+        client=self.client, # one loopback or direct client shared by every endpoint
+        executor=self.executor,
+        dependency=self.dependencies.get(api_name),
+        batching=self.batching,
+        cache=ResultCache.for_api(self.cache, self.src, api_name, output_store=self.output_store),
+        single_flight=self.single_flight,
+        validation=self.validation,
+        breaker=self.breaker,
       )
       for api_name, config_dict in self.api_info["named_endpoints"].items()
     }
@@ -378,37 +837,94 @@ class LocalGradioApplication:
   def apis(self)->dict[str,GradioAPI]:
     return self.__apis
 
-  def load_blocks(self, *TOIGNORE)->gr.Blocks:
+  def load_blocks(self, *TOIGNORE)->"gr.Blocks":
     return self.app
 
-class RemoteGradioApplication:
-  src:str
+# the connection and introspection of one upstream app, shared by every prefix pointing to it
+class Upstream:
+  srcs:list[str]
+  src:str # canonical uri, keys snapshots, caches and downloads
   client_docuemnt:str
   client_info_dict:dict
-  apis:dict[str, GradioAPI]
+  snapshot:Snapshot | None
+  from_snapshot:bool
+  schema_drift:bool | None
+  connection_error:str | None
+  reconnect_delay:float = 1.0 # seconds, doubled after each failed background connect
+  max_reconnect_delay:float = 60.0
 
   def __init__(
     self,
-    src:str,
+    srcs:list[str],
+    snapshot_store:SnapshotStore | None = None,
+    load_balance:LOAD_BALANCE_STRATEGY = "least_outstanding",
     **gr_client_kwargs,
   ):
-    client_kwargs = {
-      "src":src,
-      **gr_client_kwargs,
-    }
+    self.srcs = srcs
+    self.src = canonical_uri(srcs[0])
+    self.snapshot_store = snapshot_store
+    self.schema_drift = None
+    self.connection_error = None
+    self.load_balance = load_balance
+    self.gr_client_kwargs = gr_client_kwargs
+    self.breaker: CircuitBreaker | None = None
+    self.__breaker_lock = threading.Lock()
+
+    self.snapshot = snapshot_store.load(self.src) if snapshot_store else None
+    self.from_snapshot = self.snapshot is not None
+    if not self.from_snapshot:
+      self.__client = self._connect()
+      self.client.view_api() # print information
+      self._fetch_client_info()
+      self._save_snapshot()
+      self.dependencies = named_dependencies(self.client.primary.config)
+    else:
+      # serve routes from the snapshot right away, the client connects in background
+      self.__client = Future()
+      self.client_docuemnt = self.snapshot.client_docuemnt
+      self.client_info_dict = self.snapshot.client_info_dict
+      self.dependencies = named_dependencies(self.snapshot.config)
+      threading.Thread(
+        target=self._revalidate_snapshot,
+        name=f"gradio2api-revalidate-{self.src}",
+        daemon=True,
+      ).start()
+    self.introspection_bytes = (
+      len(json.dumps(self.client_info_dict, default=str))
+      + len(self.client_docuemnt or "")
+    )
 
-    self.__client = LoadGradioClient(
-      **client_kwargs
+  def breaker_for(self, config:BreakerConfig | None)->CircuitBreaker | None:
+    # one breaker per upstream, whichever prefix asks first sets its config
+    if config is None:
+      return None
+    with self.__breaker_lock:
+      if self.breaker is None:
+        self.breaker = CircuitBreaker(config)
+      elif self.breaker.config != config:
+        print("[SKIP BREAKER CONFIG]", self.src, "already has a breaker, its config is kept")
+    return self.breaker
+
+  def _connect(self)->ClientPool:
+    return ClientPool(
+      self.srcs,
+      strategy=self.load_balance,
+      **self.gr_client_kwargs,
     )
 
-    self._preapre_apis()
+  @property
+  def client(self)->ClientPool:
+    if isinstance(self.__client, Future):
+      return self.__client.result()
+    return self.__client
 
   @property
-  def client(self):
+  def lazy_client(self)->ClientPool | PendingClient:
+    if isinstance(self.__client, Future):
+      return PendingClient(self)
     return self.__client
 
-  def _preapre_apis(self):
-    self.client.view_api() # print information
+  def _fetch_client_info(self):
     self.client_docuemnt = self.client.view_api(
       print_info=False,
       return_format="str",
@@ -419,11 +935,151 @@ class RemoteGradioApplication:
       return_format="dict",
     )
 
+  def _save_snapshot(self):
+    if self.snapshot_store is None:
+      return
+    self.snapshot = self.snapshot_store.save(
+      self.src,
+      client_info_dict=self.client_info_dict,
+      client_docuemnt=self.client_docuemnt,
+      config=self.client.primary.config,
+    )
+
+  def _connect_in_background(self)->ClientPool:
+    # calls fail fast with the last error while the upstream is down, then wait for the next attempt
+    delay = self.reconnect_delay
+    while True:
+      future = self.__client
+      try:
+        client = self._connect()
+      except Exception as e:
+        self.connection_error = f"{type(e).__name__}: {e}"
+        print("[SKIP ERROR]", self.src, e, f"(retrying in {delay:.0f}s)")
+        future.set_exception(e)
+        time.sleep(delay)
+        delay = min(delay * 2, self.max_reconnect_delay)
+        self.__client = Future()
+        continue
+      self.connection_error = None
+      future.set_result(client)
+      self.__client = client
+      return client
+
+  def _revalidate_snapshot(self):
+    client = self._connect_in_background()
+    if not self.snapshot_store.revalidate:
+      return
+
+    # routes keep the snapshot schema, a drift is reported and stored for the next boot
+    fresh_info_dict = client.view_api(print_info=False, return_format="dict")
+    self.schema_drift = schema_hash(fresh_info_dict) != self.snapshot.schema_hash
+    if self.schema_drift:
+      print("[SCHEMA DRIFT]", self.src)
+      self.snapshot_store.save(
+        self.src,
+        client_info_dict=fresh_info_dict,
+        client_docuemnt=client.view_api(print_info=False, return_format="str"),
+        config=client.primary.config,
+      )
+
+class RemoteGradioApplication:
+  upstream:Upstream
+  apis:dict[str, GradioAPI]
+
+  def __init__(
+    self,
+    src:str | list[str], # several uris are replicas of the same app
+    max_concurrency:int | None = None,
+    snapshot_store:SnapshotStore | None = None,
+    load_balance:LOAD_BALANCE_STRATEGY = "least_outstanding",
+    batching:BatchConfig | None = None,
+    cache:CacheConfig | None = None,
+    single_flight:bool | list[str] = False,
+    output_store:OutputStore | None = None,
+    breaker:BreakerConfig | None = None,
+    validation:VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict",
+    upstreams:UpstreamRegistry | None = None, # prefixes of one registry share identical upstreams
+    **gr_client_kwargs,
+  ):
+    srcs = [src] if isinstance(src, str) else list(src)
+    self.executor = make_executor(max_concurrency)
+    self.batching = batching
+    self.cache = cache
+    self.single_flight = single_flight
+    self.validation = validation
+    self.output_store = output_store
+    if output_store is not None:
+      gr_client_kwargs.setdefault("download_files", output_store.download_dir(canonical_uri(srcs[0])))
+
+    build = functools.partial(
+      Upstream,
+      srcs,
+      snapshot_store=snapshot_store,
+      load_balance=load_balance,
+      **gr_client_kwargs,
+    )
+    if upstreams is None:
+      self.upstream = build()
+    else:
+      self.upstream = upstreams.get(
+        upstream_key(
+          srcs,
+          load_balance=load_balance,
+          snapshot_dir=snapshot_store.directory if snapshot_store else None,
+          **gr_client_kwargs,
+        ),
+        build,
+      )
+    # the upstream fails for every prefix pointing to it, they trip together
+    self.breaker = self.upstream.breaker_for(breaker)
+
+    self._preapre_apis()
+
+  @property
+  def src(self)->str:
+    return self.upstream.src
+
+  @property
+  def srcs(self)->list[str]:
+    return self.upstream.srcs
+
+  @property
+  def client(self)->ClientPool:
+    return self.upstream.client
+
+  @property
+  def client_docuemnt(self)->str:
+    return self.upstream.client_docuemnt
+
+  @property
+  def client_info_dict(self)->dict:
+    return self.upstream.client_info_dict
+
+  @property
+  def snapshot(self)->Snapshot | None:
+    return self.upstream.snapshot
+
+  @property
+  def from_snapshot(self)->bool:
+    return self.upstream.from_snapshot
+
+  @property
+  def schema_drift(self)->bool | None:
+    return self.upstream.schema_drift
+
+  def _preapre_apis(self):
     self.__apis = {
       api_name:GradioAPI(
         api_name=api_name,
         config_dict=config_dict,
-        client=self.client,
+        client=self.upstream.lazy_client,
+        executor=self.executor,
+        dependency=self.upstream.dependencies.get(api_name),
+        batching=self.batching,
+        cache=ResultCache.for_api(self.cache, self.src, api_name, output_store=self.output_store),
+        single_flight=self.single_flight,
+        validation=self.validation,
+        breaker=self.breaker,
       )
       for api_name, config_dict in self.client_info_dict["named_endpoints"].items()
     }
@@ -432,8 +1088,11 @@ class RemoteGradioApplication:
   def apis(self)->dict[str,GradioAPI]:
     return self.__apis
 
-  def load_blocks(self, prefix:None|str=None)->gr.Blocks:
-    client = self.client
+  def load_blocks(self, prefix:None|str=None)->"gr.Blocks":
+    import gradio as gr
+    from gradio.exceptions import GradioVersionIncompatibleError
+
+    client = self.client.primary
 
     if client.app_version < version.Version("4.0.0b14"):
         raise GradioVersionIncompatibleError(
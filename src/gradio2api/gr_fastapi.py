@@ -1,29 +1,171 @@
-from fastapi import APIRouter
-from .gr_application import RemoteGradioApplication as RGA, LocalGradioApplication as LGA 
-from gradio import Blocks
-import gradio as gr
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from .gr_application import RemoteGradioApplication as RGA, LocalGradioApplication as LGA, VALIDATION_MODE
+from .utils.snapshot import SnapshotStore
+from .utils.upstream import UpstreamRegistry
+from .client_pool import LOAD_BALANCE_STRATEGY
+from .batching import BatchConfig
+from .cache import CacheConfig
+from .jobs import JobStore, JobStoreConfig, JobStatus, JobStoreFull, make_job_store
+from .files import FILE_OUTPUT, FileRegistry, spool_upload, remove_upload, resolve_uploads
+from .output_store import OutputStore
+from .metrics import EndpointMetrics
+from .breaker import BreakerConfig, CircuitOpen, UpstreamTimeout
+from .encoding import EncodingConfig, encode_response
+from .admission import AdmissionConfig, AdmissionScheduler, AdmissionRejected, PrefixAdmission
+from starlette.datastructures import UploadFile
+from fastapi.responses import FileResponse
+import asyncio
+import functools
+import math
+import time
+import json
+from typing import TYPE_CHECKING, Callable
+if TYPE_CHECKING: # gradio is only imported to build GUIs
+  from gradio import Blocks
+
+class TrackedStreamingResponse(StreamingResponse):
+  # in flight until its body is sent or the client is gone, not only until the handler returns
+  on_close: Callable[[], None] | None = None
+
+  async def __call__(self, scope, receive, send):
+    try:
+      await super().__call__(scope, receive, send)
+    finally:
+      if self.on_close is not None:
+        self.on_close()
+
+def _closed(metrics:EndpointMetrics):
+  metrics.in_flight -= 1
 
 class GradioAPIRouter(APIRouter):
   gradio_application: RGA | LGA
+  job_store: JobStore
+  file_output: FILE_OUTPUT
+  file_registry: FileRegistry
+  admission: PrefixAdmission | None
 
   def __init__(
     self,
     gradio_application: RGA | LGA,
     *router_args,
+    jobs:JobStoreConfig | None = None,
+    file_output:FILE_OUTPUT = "path",
+    admission:AdmissionConfig | None = None,
+    scheduler:AdmissionScheduler | None = None, # shared with other routers for a global cap and fair ordering
+    bulk_concurrency:int = 8, # items of one {api_name}/batch request in flight
+    encoding:EncodingConfig | None = None, # Accept driven JSON, MessagePack and compression
     **router_kwargs,
   ):
     super().__init__(*router_args, **router_kwargs)
     self.gradio_application = gradio_application
+    self.bulk_concurrency = bulk_concurrency
+    self.encoding = encoding
+    self.admission = None
+    if admission is not None or scheduler is not None:
+      self.admission = (scheduler or AdmissionScheduler()).register(self.prefix, admission)
+    self.job_store = make_job_store(jobs)
+    self.file_output = file_output
+    self.output_store = gradio_application.output_store
+    self.file_registry = FileRegistry(
+      [self.output_store.root] if self.output_store is not None else None
+    )
+    self._files_route_name = f"gradio2api_files_{id(self)}"
     self._preprocess()
 
-  def load_gr_blocks(self, prefix:None|str)->Blocks:
+  def load_gr_blocks(self, prefix:None|str)->"Blocks":
     return self.gradio_application.load_blocks(prefix)
 
+  @property
+  def endpoint_metrics(self)->list[EndpointMetrics]:
+    return [api.metrics for api in self.gradio_application.apis.values()]
+
   def _preprocess(self):
-    for api_name in self.gradio_application.apis.keys():
+    for api_name, api in self.gradio_application.apis.items():
+      api.metrics = EndpointMetrics(self.prefix, api_name)
+      api.admission = self.admission
       self._register_gradio_api(
         api_name=api_name,
       )
+      if api.is_generator:
+        self._register_gradio_stream_api(
+          api_name=api_name,
+        )
+      self._register_gradio_job_api(
+        api_name=api_name,
+      )
+      self._register_gradio_bulk_api(
+        api_name=api_name,
+      )
+      if api.has_file_parameters:
+        self._register_gradio_upload_api(
+          api_name=api_name,
+        )
+    self._register_job_routes()
+    self._register_file_routes()
+
+  def _post_api(self, api, path:str, **route_kwargs):
+    # every route of an endpoint is counted here: requests, errors, in flight, latency
+    metrics = api.metrics
+    def decorator(endpoint):
+      @functools.wraps(endpoint)
+      async def __instrumented(*args, **kwargs):
+        metrics.requests += 1
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        streaming = False
+        try:
+          response = await endpoint(*args, **kwargs)
+          if isinstance(response, TrackedStreamingResponse):
+            # an open stream keeps using the executor, drains wait for it
+            streaming = True
+            response.on_close = functools.partial(_closed, metrics)
+          return response
+        except CircuitOpen as e:
+          metrics.errors += 1
+          raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+          )
+        except AdmissionRejected as e:
+          metrics.errors += 1
+          raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+          )
+        except UpstreamTimeout as e:
+          metrics.errors += 1
+          raise HTTPException(status_code=504, detail=str(e))
+        except Exception:
+          metrics.errors += 1
+          raise
+        finally:
+          if not streaming:
+            metrics.in_flight -= 1
+          metrics.latency.observe(time.perf_counter() - start)
+      return self.post(path, **route_kwargs)(__instrumented)
+    return decorator
+
+  def _to_response(self, api, request:Request, gr_result:list):
+    if self.output_store is not None:
+      self.output_store.touch(gr_result)
+    if self.file_output == "url":
+      gr_result = self.file_registry.publish(
+        gr_result,
+        lambda token, name: str(request.url_for(self._files_route_name, token=token, name=name)),
+      )
+    return api.normalize_output(gr_result)
+
+  def _respond(self, api, request:Request, gr_result:list):
+    output = self._to_response(api, request, gr_result)
+    if self.encoding is not None:
+      # the output is validated by normalize_output already, FastAPI's second pass is skipped
+      return encode_response(api.dump_output(output), request, self.encoding)
+    if api.validation == "strict":
+      return output # validated again by FastAPI against the response_model
+    return Response(content=api.dump_output_json(output), media_type="application/json")
 
   def _register_gradio_api(
     self,
@@ -34,47 +176,353 @@ class GradioAPIRouter(APIRouter):
     request_model = api.parameter_model
     response_model = api.return_model
 
-    async def __call_api(item):
-      return api(item)
+    async def __call_api(item, request):
+      gr_result = await api.apredict(
+        item,
+        return_fomat="list",
+        cache_control=request.headers.get("cache-control"),
+      )
+      return self._respond(api, request, gr_result)
     __call_api.__annotations__ = {
       "item":request_model,
+      "request":Request,
       "return":response_model,
     }
 
     if tags is None:
       tags = []
 
-    self.post(
+    self._post_api(
+      api,
       api_name,
       tags=tags
     )(__call_api)
 
+  def _register_gradio_stream_api(
+    self,
+    api_name:str,
+    tags:list[str] | None = [],
+  ):
+    api = self.gradio_application.apis[api_name]
+    request_model = api.parameter_model
+
+    async def __stream_api(item, request):
+      if api.breaker is not None:
+        api.breaker.check()
+      if api.admission is not None:
+        api.admission.check(api.api_name)
+      # Server-Sent Events by default, NDJSON when asked through Accept
+      ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+      async def _chunks():
+        try:
+          async for gr_result in api.astream(item, return_fomat="list"):
+            data = api.dump_output_json(self._to_response(api, request, gr_result)).decode()
+            yield f"{data}\n" if ndjson else f"data: {data}\n\n"
+        except Exception as e:
+          error = json.dumps({"error": str(e)})
+          yield f"{error}\n" if ndjson else f"event: error\ndata: {error}\n\n"
+          return
+        if not ndjson:
+          yield "event: end\ndata: null\n\n"
+
+      return TrackedStreamingResponse(
+        _chunks(),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+      )
+    __stream_api.__annotations__ = {
+      "item":request_model,
+      "request":Request,
+    }
+
+    if tags is None:
+      tags = []
+
+    self._post_api(
+      api,
+      f"{api_name}/stream",
+      tags=tags,
+      response_class=StreamingResponse,
+      responses={200: {"content": {"text/event-stream": {}, "application/x-ndjson": {}}}},
+    )(__stream_api)
+
+  def _register_gradio_job_api(
+    self,
+    api_name:str,
+    tags:list[str] | None = [],
+  ):
+    api = self.gradio_application.apis[api_name]
+    request_model = api.parameter_model
+
+    async def __submit_job(item, request)->JobStatus:
+      if api.breaker is not None:
+        api.breaker.check()
+      if api.admission is not None:
+        api.admission.check(api.api_name)
+      def _format(gr_result):
+        gr_result = api._format_result(gr_result, return_fomat="list")
+        return api.dump_output(self._to_response(api, request, gr_result))
+      try:
+        return self.job_store.start(
+          api_name,
+          run_fn=lambda on_submit: api.arun_job(item, on_submit),
+          format_fn=_format,
+        )
+      except JobStoreFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    __submit_job.__annotations__ = {
+      "item":request_model,
+      "request":Request,
+      "return":JobStatus,
+    }
+
+    if tags is None:
+      tags = []
+
+    self._post_api(
+      api,
+      f"{api_name}/jobs",
+      tags=tags,
+      status_code=202,
+    )(__submit_job)
+
+  def _register_gradio_bulk_api(
+    self,
+    api_name:str,
+    tags:list[str] | None = [],
+  ):
+    api = self.gradio_application.apis[api_name]
+    request_model = api.parameter_model
+
+    async def __bulk_api(items, request, concurrency:int | None = None):
+      if api.breaker is not None:
+        api.breaker.check()
+      if api.admission is not None:
+        api.admission.check(api.api_name)
+      limit = max(1, min(concurrency or self.bulk_concurrency, self.bulk_concurrency))
+      cache_control = request.headers.get("cache-control")
+
+      async def _run(index:int, item)->dict:
+        try:
+          gr_result = await api.apredict(item, return_fomat="list", cache_control=cache_control)
+          return {"index": index, "output": api.dump_output(self._to_response(api, request, gr_result))}
+        except Exception as e:
+          # one failing item never fails the batch
+          return {"index": index, "error": str(e)}
+
+      async def _lines():
+        # a fixed set of workers instead of a task per item, results in completion order
+        done = asyncio.Queue()
+        pending = iter(enumerate(items))
+        async def _worker():
+          for index, item in pending:
+            done.put_nowait(await _run(index, item))
+
+        workers = [asyncio.create_task(_worker()) for _ in range(min(limit, len(items)))]
+        try:
+          for _ in items:
+            yield json.dumps(await done.get()) + "\n"
+        finally:
+          for worker in workers:
+            worker.cancel()
+
+      return TrackedStreamingResponse(_lines(), media_type="application/x-ndjson")
+    __bulk_api.__annotations__ = {
+      "items":list[request_model],
+      "request":Request,
+      "concurrency":int | None,
+    }
+
+    if tags is None:
+      tags = []
+
+    self._post_api(
+      api,
+      f"{api_name}/batch",
+      tags=tags,
+      response_class=StreamingResponse,
+      responses={200: {"content": {"application/x-ndjson": {}}}},
+    )(__bulk_api)
+
+  def _register_gradio_upload_api(
+    self,
+    api_name:str,
+    tags:list[str] | None = [],
+  ):
+    api = self.gradio_application.apis[api_name]
+    request_model = api.parameter_model
+    response_model = api.return_model
+
+    async def __upload_api(request:Request):
+      # multipart form: "item" holds the json body, file fields are
+      # referenced from it as {"upload": "<form field name>"}
+      form = await request.form()
+      loop = asyncio.get_running_loop()
+      uploads = {}
+      try:
+        for field_name, value in form.multi_items():
+          if isinstance(value, UploadFile):
+            uploads[field_name] = await loop.run_in_executor(None, spool_upload, value)
+        try:
+          payload = resolve_uploads(json.loads(form.get("item", "{}")), uploads)
+          item = api.parameter_adapter.validate_python(payload)
+        except Exception as e:
+          raise HTTPException(status_code=422, detail=str(e))
+        gr_result = await api.apredict(
+          item,
+          return_fomat="list",
+          cache_control=request.headers.get("cache-control"),
+        )
+        return self._respond(api, request, gr_result)
+      finally:
+        await form.close()
+        for path in uploads.values():
+          remove_upload(path)
+    __upload_api.__annotations__["return"] = response_model
+
+    if tags is None:
+      tags = []
+
+    self._post_api(
+      api,
+      f"{api_name}/upload",
+      tags=tags,
+      openapi_extra={
+        "requestBody": {
+          "content": {
+            "multipart/form-data": {
+              "schema": {
+                "type": "object",
+                "properties": {"item": {"type": "string", "description": f"json of {request_model.__name__}"}},
+                "additionalProperties": {"type": "string", "format": "binary"},
+              },
+            },
+          },
+        },
+      },
+    )(__upload_api)
+
+  def _register_file_routes(self):
+    @self.get("/files/{token}/{name}", name=self._files_route_name)
+    def get_file(token:str, name:str):
+      path = self.file_registry.resolve(token)
+      if path is None:
+        raise HTTPException(status_code=404, detail="file not found")
+      return FileResponse(path, filename=name)
+
+  def _register_job_routes(self):
+    def _get_record(job_id:str):
+      record = self.job_store.get(job_id)
+      if record is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+      return record
+
+    @self.get("/jobs/{job_id}")
+    def get_job_status(job_id:str)->JobStatus:
+      return _get_record(job_id).status
+
+    @self.get("/jobs/{job_id}/result")
+    def get_job_result(job_id:str, request:Request):
+      record = _get_record(job_id)
+      if record.status.state in ("pending", "running"):
+        return JSONResponse(status_code=202, content=record.status.model_dump(mode="json"))
+      if record.status.state == "failed":
+        raise HTTPException(status_code=502, detail=record.status.error)
+      if record.status.state == "cancelled":
+        raise HTTPException(status_code=410, detail="job was cancelled")
+      if self.encoding is not None:
+        return encode_response(record.result, request, self.encoding)
+      return record.result
+
 class LocalGradioAppRouter(GradioAPIRouter):
   gradio_application: LGA
   def __init__(
       self,
-      app:Blocks,
+      app:"Blocks",
       *router_args,
+      max_concurrency:int | None = None,
+      batching:BatchConfig | None = None,
+      cache:CacheConfig | None = None,
+      single_flight:bool | list[str] = False,
+      output_store:OutputStore | None = None,
+      breaker:BreakerConfig | None = None,
+      validation:VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict",
+      jobs:JobStoreConfig | None = None,
+      file_output:FILE_OUTPUT = "path",
+      admission:AdmissionConfig | None = None,
+      scheduler:AdmissionScheduler | None = None,
+      bulk_concurrency:int = 8,
+      encoding:EncodingConfig | None = None,
+      direct:bool = False, # skip the loopback gradio server, see LocalGradioApplication
       **router_kwargs,
   ):
     super().__init__(
-      gradio_application=LGA(app),
+      gradio_application=LGA(
+        app,
+        max_concurrency=max_concurrency,
+        batching=batching,
+        cache=cache,
+        single_flight=single_flight,
+        output_store=output_store,
+        breaker=breaker,
+        validation=validation,
+        direct=direct,
+      ),
       *router_args,
+      jobs=jobs,
+      file_output=file_output,
+      admission=admission,
+      scheduler=scheduler,
+      bulk_concurrency=bulk_concurrency,
+      encoding=encoding,
       **router_kwargs
     )
 
 class RemoteGradioAppRouter(GradioAPIRouter):
-  gradio_uri:str
+  gradio_uri:str | list[str]
 
   def __init__(
       self,
-      gradio_uri:str,
+      gradio_uri:str | list[str],
       *router_args,
+      max_concurrency:int | None = None,
+      snapshot_store:SnapshotStore | None = None,
+      load_balance:LOAD_BALANCE_STRATEGY = "least_outstanding",
+      batching:BatchConfig | None = None,
+      cache:CacheConfig | None = None,
+      single_flight:bool | list[str] = False,
+      output_store:OutputStore | None = None,
+      breaker:BreakerConfig | None = None,
+      validation:VALIDATION_MODE | dict[str, VALIDATION_MODE] = "strict",
+      jobs:JobStoreConfig | None = None,
+      file_output:FILE_OUTPUT = "path",
+      admission:AdmissionConfig | None = None,
+      scheduler:AdmissionScheduler | None = None,
+      bulk_concurrency:int = 8,
+      encoding:EncodingConfig | None = None,
+      upstreams:UpstreamRegistry | None = None,
       **router_kwargs,
   ):
     super().__init__(
-      gradio_application=RGA(src=gradio_uri),
+      gradio_application=RGA(
+        src=gradio_uri,
+        max_concurrency=max_concurrency,
+        snapshot_store=snapshot_store,
+        load_balance=load_balance,
+        batching=batching,
+        cache=cache,
+        single_flight=single_flight,
+        output_store=output_store,
+        breaker=breaker,
+        validation=validation,
+        upstreams=upstreams,
+      ),
       *router_args,
+      jobs=jobs,
+      file_output=file_output,
+      admission=admission,
+      scheduler=scheduler,
+      bulk_concurrency=bulk_concurrency,
+      encoding=encoding,
       **router_kwargs
     )
     self.gradio_uri = gradio_uri
@@ -1,18 +1,25 @@
-import numpy as np
-from pydantic import BaseModel
-from typing_extensions import Literal, Any, Optional
+from pydantic import BaseModel, model_validator
+from typing_extensions import Literal, Any, Optional, TypedDict
 from datetime import datetime
-import PIL.Image
 # ------
-from gradio.components.image_editor import EditorValue
-from gradio.components.multimodal_textbox import MultimodalValue
-from gradio.components.paramviewer import Parameter
+# local copies of gradio component types, importing gradio2api never imports gradio
+class Parameter(TypedDict):
+  type: str
+  description: str
+  default: str | None
 # ------
 class FILE(BaseModel):
-  path:str
+  path:Optional[str] = None # on the aggregator host
+  url:Optional[str] = None # fetched by the upstream itself, never downloaded here
+
+  @model_validator(mode="after")
+  def check_one_source(self):
+    assert (self.path is None) != (self.url is None), "exactly one of path or url"
+    return self
+
   def to_handle_file(self):
     from gradio_client import handle_file
-    return handle_file(self.path)
+    return handle_file(self.url or self.path)
 # ------
 class _Chatbot(BaseModel):
   message: Optional[str]
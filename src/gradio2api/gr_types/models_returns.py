@@ -1,22 +1,29 @@
-import numpy as np
 from pydantic import BaseModel, ConfigDict
-from typing import List
+from typing import List, Union
 from typing_extensions import Literal, Any, Optional, NotRequired
 from datetime import datetime
-import PIL
-import PIL.Image
-from pathlib import Path
+from .models_parameters import Parameter
 # ------
-from gradio.data_classes import FileData
-from gradio.components.plot import (
-  AltairPlotData as value_AltairPlotData,
-  PlotData as G_PlotData
-)
-from gradio.components.paramviewer import Parameter
-from gradio.components.label import LabelData
+# local copies of gradio component types, importing gradio2api never imports gradio
+class G_PlotData(BaseModel):
+  type: Literal["altair", "bokeh", "plotly", "matplotlib"]
+  plot: str
+
+class value_AltairPlotData(G_PlotData):
+  chart: Literal["bar", "line", "scatter"]
+  type: Literal["altair"] = "altair"
+
+class LabelConfidence(BaseModel):
+  label: Optional[Union[str, int, float]] = None
+  confidence: Optional[float] = None
 
-from gradio.components.highlighted_text import HighlightedToken
+class LabelData(BaseModel):
+  label: Optional[Union[str, int, float]] = None
+  confidences: Optional[List[LabelConfidence]] = None
 
+class HighlightedToken(BaseModel):
+  token: str
+  class_or_confidence: Union[str, float, None] = None
 # ------
 FILE = str
 # ------
@@ -51,8 +58,7 @@ class _Video(BaseModel):
   video: FILE
   subtitles: FILE | None = None
 # ------
-from gradio.data_classes import GradioRootModel
-def get_root_type_of_T(T:GradioRootModel):
+def get_root_type_of_T(T:type[BaseModel]): # a gradio.data_classes.GradioRootModel
   return T.model_fields["root"].annotation
 
 # ------
@@ -0,0 +1,206 @@
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Literal, Optional
+from collections import OrderedDict
+from dataclasses import asdict
+from gradio_client.client import Job
+from gradio_client.utils import Status as GrStatus
+import threading
+import asyncio
+import sqlite3
+import json
+import uuid
+import time
+
+JOB_STATE = Literal["pending", "running", "finished", "failed", "cancelled"]
+DONE_STATES = ("finished", "failed", "cancelled")
+
+class JobStoreConfig(BaseModel):
+  max_jobs: int = 1024
+  ttl: float = 3600 # seconds a finished job is kept
+  sqlite_path: Optional[str] = None
+
+class JobStatus(BaseModel):
+  job_id: str
+  api_name: str
+  state: JOB_STATE = "pending"
+  queue_position: Optional[int] = None
+  queue_size: Optional[int] = None
+  eta: Optional[float] = None
+  progress: Optional[list[dict[str, Any]]] = None
+  error: Optional[str] = None
+  created_at: float
+  finished_at: Optional[float] = None
+
+class JobStoreFull(Exception):
+  ...
+
+class JobRecord:
+  status: JobStatus
+  result: Any
+  job: Job | None
+
+  def __init__(self, status:JobStatus, job:Job | None = None, result:Any = None):
+    self.status = status
+    self.job = job
+    self.result = result
+
+  def refresh(self):
+    # live state comes from the gradio_client Job until it is done
+    if self.job is None or self.status.state in DONE_STATES:
+      return
+    update = self.job.status()
+    self.status.queue_position = update.rank
+    self.status.queue_size = update.queue_size
+    self.status.eta = update.eta
+    if update.progress_data:
+      self.status.progress = [asdict(unit) for unit in update.progress_data]
+    if update.code in (GrStatus.PROCESSING, GrStatus.ITERATING, GrStatus.PROGRESS):
+      self.status.state = "running"
+
+class JobStore:
+  config: JobStoreConfig
+
+  def __init__(self, config:JobStoreConfig | None = None):
+    self.config = config or JobStoreConfig()
+    self.__records: OrderedDict[str, JobRecord] = OrderedDict()
+    self.__lock = threading.Lock()
+    self.__tasks: set[asyncio.Task] = set()
+
+  def _evict(self):
+    now = time.time()
+    for job_id, record in list(self.__records.items()):
+      finished_at = record.status.finished_at
+      if finished_at is not None and finished_at + self.config.ttl < now:
+        del self.__records[job_id]
+
+    if len(self.__records) < self.config.max_jobs:
+      return
+    for job_id, record in list(self.__records.items()):
+      if record.status.state in DONE_STATES:
+        del self.__records[job_id]
+        if len(self.__records) < self.config.max_jobs:
+          return
+    raise JobStoreFull(f"{self.config.max_jobs} jobs are still running")
+
+  def start(
+      self,
+      api_name:str,
+      run_fn:Callable[[Callable[[Job], None]], Awaitable[Any]], # hands the upstream job over once submitted
+      format_fn:Callable[[Any], Any],
+    )->JobStatus:
+    with self.__lock:
+      self._evict()
+      status = JobStatus(
+        job_id=uuid.uuid4().hex,
+        api_name=api_name,
+        created_at=time.time(),
+      )
+      record = JobRecord(status)
+      self.__records[status.job_id] = record
+
+    # the job stays pending until run_fn is admitted and submits it
+    task = asyncio.get_running_loop().create_task(self._run(record, run_fn, format_fn))
+    self.__tasks.add(task)
+    task.add_done_callback(self.__tasks.discard)
+    self._save(record)
+    return status
+
+  async def _run(
+      self,
+      record:JobRecord,
+      run_fn:Callable[[Callable[[Job], None]], Awaitable[Any]],
+      format_fn:Callable[[Any], Any],
+    ):
+    try:
+      await run_fn(lambda job: self._attach(record, job, format_fn))
+    except Exception as e:
+      if record.status.state not in DONE_STATES:
+        self._finish(record, error=e)
+
+  def _attach(self, record:JobRecord, job:Job, format_fn:Callable[[Any], Any]):
+    record.job = job
+    job.add_done_callback(lambda job: self._on_done(record, format_fn))
+    self._save(record)
+
+  def _on_done(self, record:JobRecord, format_fn:Callable[[Any], Any]):
+    job = record.job
+    if job.cancelled():
+      record.status.state = "cancelled"
+      self._finish(record)
+      return
+    try:
+      self._finish(record, result=format_fn(job.result()))
+    except Exception as e:
+      self._finish(record, error=e)
+
+  def _finish(self, record:JobRecord, result:Any = None, error:Exception | None = None):
+    if error is not None:
+      record.status.state = "failed"
+      record.status.error = str(error)
+    elif record.status.state != "cancelled":
+      record.status.state = "finished"
+      record.result = result
+    record.status.finished_at = time.time()
+    self._save(record)
+
+  def _save(self, record:JobRecord):
+    pass # records live in memory only, SQLiteJobStore persists them
+
+  def _load(self, job_id:str)->JobRecord | None:
+    return None
+
+  def get(self, job_id:str)->JobRecord | None:
+    with self.__lock:
+      record = self.__records.get(job_id)
+    if record is None:
+      return self._load(job_id)
+    record.refresh()
+    return record
+
+class SQLiteJobStore(JobStore):
+  # finished jobs survive restarts, live gradio_client jobs stay in memory
+  def __init__(self, config:JobStoreConfig):
+    super().__init__(config)
+    self.__db_lock = threading.Lock()
+    self.__db = sqlite3.connect(config.sqlite_path, check_same_thread=False)
+    with self.__db_lock, self.__db:
+      self.__db.execute(
+        "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, status TEXT, result TEXT, finished_at REAL)"
+      )
+
+  def _save(self, record:JobRecord):
+    with self.__db_lock, self.__db:
+      self.__db.execute(
+        "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+        (
+          record.status.job_id,
+          record.status.model_dump_json(),
+          json.dumps(record.result),
+          record.status.finished_at,
+        ),
+      )
+      self.__db.execute(
+        "DELETE FROM jobs WHERE finished_at < ?",
+        (time.time() - self.config.ttl,),
+      )
+
+  def _load(self, job_id:str)->JobRecord | None:
+    with self.__db_lock:
+      row = self.__db.execute(
+        "SELECT status, result FROM jobs WHERE job_id = ?",
+        (job_id,),
+      ).fetchone()
+    if row is None:
+      return None
+    status = JobStatus.model_validate_json(row[0])
+    if status.state not in DONE_STATES:
+      # the process that owned the upstream job is gone
+      status.state = "failed"
+      status.error = "job was lost on restart"
+    return JobRecord(status, result=json.loads(row[1]))
+
+def make_job_store(config:JobStoreConfig | None = None)->JobStore:
+  config = config or JobStoreConfig()
+  if config.sqlite_path:
+    return SQLiteJobStore(config)
+  return JobStore(config)
@@ -0,0 +1,105 @@
+from fastapi import FastAPI
+from starlette.routing import Mount, Router
+from contextlib import AsyncExitStack
+from typing import Callable
+import gradio as gr
+import threading
+import asyncio
+import time
+
+# gr.Blocks construction goes through process global contexts
+BUILD_LOCK = threading.Lock()
+
+class LazyGradioApp:
+  build: Callable[[], gr.Blocks]
+  blocks: gr.Blocks | None
+  last_access: float
+  active: int
+
+  def __init__(self, build:Callable[[], gr.Blocks]):
+    self.build = build
+    self.blocks = None
+    self.last_access = time.monotonic()
+    self.active = 0
+    self.__app = None
+    self.__stack = None
+    self.__lock = asyncio.Lock()
+
+  @property
+  def is_materialized(self)->bool:
+    return self.__app is not None
+
+  def _build_blocks(self)->gr.Blocks:
+    with BUILD_LOCK:
+      return self.build()
+
+  async def materialize(self)->FastAPI:
+    async with self.__lock:
+      if self.__app is not None:
+        return self.__app
+
+      loop = asyncio.get_running_loop()
+      blocks = await loop.run_in_executor(None, self._build_blocks)
+      app = gr.mount_gradio_app(FastAPI(), blocks, path="")
+      stack = AsyncExitStack()
+      # run the same startup a mounted gradio app gets from the parent lifespan
+      await stack.enter_async_context(app.router.lifespan_context(app))
+      self.blocks, self.__app, self.__stack = blocks, app, stack
+      return app
+
+  async def evict(self):
+    async with self.__lock:
+      if self.__app is None or self.active:
+        return
+      await self.__stack.aclose()
+      self.blocks.close(verbose=False)
+      self.blocks, self.__app, self.__stack = None, None, None
+
+  def is_idle(self, idle_timeout:float)->bool:
+    return (
+      self.is_materialized
+      and self.active == 0
+      and time.monotonic() - self.last_access > idle_timeout
+    )
+
+  async def __call__(self, scope, receive, send):
+    app = await self.materialize()
+    self.active += 1
+    try:
+      await app(scope, receive, send)
+    finally:
+      self.active -= 1
+      self.last_access = time.monotonic()
+
+class LazyGradioMount:
+  apps: dict[str, LazyGradioApp]
+  idle_timeout: float | None
+
+  def __init__(
+      self,
+      builders:dict[str, Callable[[], gr.Blocks]],
+      idle_timeout:float | None = None, # seconds before an unused app is evicted
+    ):
+    self.apps = {
+      path: LazyGradioApp(build)
+      for path, build in builders.items()
+    }
+    # the root app ("") matches every path, keep it last
+    self.router = Router(routes=[
+      Mount(path, app=app)
+      for path, app in sorted(self.apps.items(), key=lambda item: item[0] == "")
+    ])
+    self.idle_timeout = idle_timeout
+    self.__reaper = None
+
+  async def _evict_idle(self):
+    while True:
+      await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+      for app in self.apps.values():
+        if app.is_idle(self.idle_timeout):
+          await app.evict()
+
+  async def __call__(self, scope, receive, send):
+    if self.idle_timeout is not None and self.__reaper is None:
+      self.__reaper = asyncio.create_task(self._evict_idle())
+    await self.router(scope, receive, send)
@@ -0,0 +1,90 @@
+from typing import Iterable
+from bisect import bisect_left
+import time
+
+# seconds, upper bounds of the histogram buckets
+LATENCY_BUCKETS = (
+  0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+  0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+STAGES = ("normalize_input", "upstream", "normalize_output")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# plain counters, the event loop and the worker threads only ever add to them
+class Histogram:
+  def __init__(self, buckets:tuple[float, ...] = LATENCY_BUCKETS):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1) # the last one is +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value:float):
+    self.counts[bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+class EndpointMetrics:
+  prefix: str
+  api_name: str
+
+  def __init__(self, prefix:str, api_name:str):
+    self.prefix = prefix
+    self.api_name = api_name
+    self.requests = 0
+    self.errors = 0
+    self.in_flight = 0
+    self.latency = Histogram()
+    self.queue_wait = Histogram()
+    self.stages = {stage: Histogram() for stage in STAGES}
+
+  def observe_stage(self, stage:str, start:float):
+    self.stages[stage].observe(time.perf_counter() - start)
+
+def _escape(value:str)->str:
+  return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels:str)->str:
+  return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+def _histogram_lines(name:str, labels:str, histogram:Histogram)->list[str]:
+  lines = []
+  cumulative = 0
+  for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+    cumulative += count
+    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+  lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+  lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+  return lines
+
+def render_metrics(endpoints:Iterable[EndpointMetrics])->str:
+  # Prometheus text exposition format
+  endpoints = list(endpoints)
+  families = {
+    "gradio2api_requests_total": ("counter", "Requests received."),
+    "gradio2api_errors_total": ("counter", "Requests that raised an error."),
+    "gradio2api_in_flight": ("gauge", "Requests being served."),
+    "gradio2api_request_seconds": ("histogram", "Time to serve a request."),
+    "gradio2api_queue_wait_seconds": ("histogram", "Time waiting for a free upstream slot."),
+    "gradio2api_stage_seconds": ("histogram", "Time spent in each stage of a prediction."),
+  }
+  lines = []
+  for name, (kind, help_text) in families.items():
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for endpoint in endpoints:
+      labels = _labels(prefix=endpoint.prefix, api_name=endpoint.api_name)
+      if name == "gradio2api_requests_total":
+        lines.append(f"{name}{{{labels}}} {endpoint.requests}")
+      elif name == "gradio2api_errors_total":
+        lines.append(f"{name}{{{labels}}} {endpoint.errors}")
+      elif name == "gradio2api_in_flight":
+        lines.append(f"{name}{{{labels}}} {endpoint.in_flight}")
+      elif name == "gradio2api_request_seconds":
+        lines.extend(_histogram_lines(name, labels, endpoint.latency))
+      elif name == "gradio2api_queue_wait_seconds":
+        lines.extend(_histogram_lines(name, labels, endpoint.queue_wait))
+      else:
+        for stage, histogram in endpoint.stages.items():
+          stage_labels = f'{labels},{_labels(stage=stage)}'
+          lines.extend(_histogram_lines(name, stage_labels, histogram))
+  return "\n".join(lines) + "\n"
@@ -0,0 +1,136 @@
+from pydantic import BaseModel
+from typing import Optional
+from gradio_client.client import DEFAULT_TEMP_DIR as GR_DEFAULT_TEMP_DIR
+from .utils.hash import _make_hash
+import threading
+import shutil
+import time
+import os
+
+class OutputStoreConfig(BaseModel):
+  root: str = os.path.join(GR_DEFAULT_TEMP_DIR, "gradio2api")
+  max_bytes: Optional[int] = 5 * 1024**3
+  ttl: Optional[float] = 24 * 3600 # seconds since last access
+  sweep_interval: float = 60.0
+
+class OutputStoreStats(BaseModel):
+  bytes_held: int = 0
+  files_held: int = 0
+  bytes_evicted: int = 0
+  files_evicted: int = 0
+
+# gradio_client downloads into {root}/{upstream hash}/{sha256 of content}/{name},
+# so outputs are already content addressed and deduplicated per upstream
+class OutputStore:
+  config: OutputStoreConfig
+  stats: OutputStoreStats
+
+  def __init__(self, config:OutputStoreConfig | None = None):
+    self.config = config or OutputStoreConfig()
+    self.root = os.path.realpath(self.config.root)
+    os.makedirs(self.root, exist_ok=True)
+    self.stats = OutputStoreStats()
+    self.__last_access: dict[str, float] = {}
+    self.__lock = threading.Lock()
+    self.__wake = threading.Event()
+    self.sweep()
+    threading.Thread(
+      target=self._sweep_forever,
+      name="gradio2api-output-store",
+      daemon=True,
+    ).start()
+
+  def download_dir(self, upstream:str)->str:
+    directory = os.path.join(self.root, _make_hash(upstream))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+  def _owns(self, path:str)->bool:
+    return path.startswith(self.root + os.sep) and os.path.isfile(path)
+
+  def touch(self, value):
+    # mark output files handed to API users as recently used
+    if isinstance(value, str):
+      if not self._owns(value):
+        return
+      directory = os.path.dirname(value)
+      with self.__lock:
+        if directory not in self.__last_access:
+          # a fresh download, sweep early rather than waiting for the interval
+          self.stats.bytes_held += os.path.getsize(value)
+          self.stats.files_held += 1
+        self.__last_access[directory] = time.time()
+      if self.config.max_bytes is not None and self.stats.bytes_held > self.config.max_bytes:
+        self.__wake.set()
+    elif isinstance(value, dict):
+      for v in value.values():
+        self.touch(v)
+    elif isinstance(value, (list, tuple)):
+      for v in value:
+        self.touch(v)
+
+  def has_missing_files(self, value)->bool:
+    # an output file of the store evicted since value was produced
+    if isinstance(value, str):
+      return value.startswith(self.root + os.sep) and not os.path.isfile(value)
+    if isinstance(value, dict):
+      return any(self.has_missing_files(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+      return any(self.has_missing_files(v) for v in value)
+    return False
+
+  def _entries(self)->list[tuple[str, float, int]]:
+    # one entry per content directory: (directory, last access, bytes)
+    entries = []
+    for upstream in os.scandir(self.root):
+      if not upstream.is_dir():
+        continue
+      for content in os.scandir(upstream.path):
+        if not content.is_dir():
+          continue
+        size, mtime = 0, 0.0
+        for f in os.scandir(content.path):
+          if f.is_file():
+            stat = f.stat()
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+        last_access = self.__last_access.get(content.path, mtime)
+        entries.append((content.path, last_access, size))
+    return entries
+
+  def sweep(self):
+    # disk is scanned and cleaned outside the lock, touch runs on the event loop
+    entries = sorted(self._entries(), key=lambda entry: entry[1])
+    now = time.time()
+    held = sum(size for _, _, size in entries)
+    kept, evicted = {}, []
+    for directory, last_access, size in entries:
+      expired = self.config.ttl is not None and last_access + self.config.ttl < now
+      over_quota = self.config.max_bytes is not None and held > self.config.max_bytes
+      if expired or over_quota: # least recently used go first
+        evicted.append((directory, size))
+        held -= size
+      else:
+        kept[directory] = last_access
+
+    with self.__lock:
+      for directory in kept:
+        # keep accesses recorded while scanning
+        kept[directory] = max(kept[directory], self.__last_access.get(directory, 0.0))
+      self.__last_access = kept
+      self.stats.bytes_held = held
+      self.stats.files_held = len(kept)
+      self.stats.bytes_evicted += sum(size for _, size in evicted)
+      self.stats.files_evicted += len(evicted)
+
+    for directory, _ in evicted:
+      shutil.rmtree(directory, ignore_errors=True)
+
+  def _sweep_forever(self):
+    while True:
+      self.__wake.wait(self.config.sweep_interval)
+      self.__wake.clear()
+      try:
+        self.sweep()
+      except Exception as e:
+        print("[SKIP ERROR]", e)
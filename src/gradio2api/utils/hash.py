@@ -17,3 +17,42 @@ def _add_and_verify_hash(hash:str):
 def add_key_and_verify(x:str|bytes, *args):
   hash = _make_hash(x, *args)
   _add_and_verify_hash(hash)
+
+def _make_file_hash(path:str, digest_size=HASH_DIGEST_SIZE, chunk_size=1<<20)->str:
+  from hashlib import blake2b
+  h = blake2b(digest_size=digest_size)
+  with open(path, "rb") as f:
+    while chunk := f.read(chunk_size):
+      h.update(chunk)
+  return h.hexdigest()
+
+def _is_file_data(x)->bool:
+  return isinstance(x, dict) and x.get("meta", {}).get("_type") == "gradio.FileData"
+
+def has_file_data(x)->bool:
+  # make_input_key reads these files, callers on an event loop run it in a thread
+  if _is_file_data(x):
+    return True
+  if isinstance(x, dict):
+    return any(has_file_data(v) for v in x.values())
+  if isinstance(x, (list, tuple)):
+    return any(has_file_data(v) for v in x)
+  return False
+
+def make_input_key(api_name:str, item:dict)->str:
+  # files handed to gradio_client are keyed by content, not by their temp path
+  import json
+  def _file_by_content(x):
+    if isinstance(x, dict):
+      if _is_file_data(x) and os.path.isfile(x.get("path", "")):
+        return {"file": _make_file_hash(x["path"])}
+      return {k: _file_by_content(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+      return [_file_by_content(v) for v in x]
+    return x
+
+  return _make_hash(json.dumps(
+    [api_name, _file_by_content(item)],
+    sort_keys=True,
+    default=str,
+  ))
@@ -0,0 +1,13 @@
+import resource
+import sys
+import os
+
+def rss_bytes()->tuple[int | None, int]:
+  # (current, peak) resident set size, the current one is None where /proc is missing
+  max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  max_rss = max_rss if sys.platform == "darwin" else max_rss * 1024 # kilobytes on linux
+  try:
+    with open("/proc/self/statm") as f:
+      return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"), max_rss
+  except (OSError, ValueError, IndexError):
+    return None, max_rss
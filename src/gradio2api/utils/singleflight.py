@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import Awaitable, Callable
+import asyncio
+
+class SingleFlightStats(BaseModel):
+  calls: int = 0
+  deduplicated: int = 0
+  in_flight: int = 0
+
+# concurrent calls with the same key share the first caller's result
+class SingleFlight:
+  stats: SingleFlightStats
+
+  def __init__(self):
+    self.stats = SingleFlightStats()
+    self.__in_flight: dict[str, asyncio.Future] = {}
+
+  def _forget(self, key:str, future:asyncio.Future):
+    if self.__in_flight.get(key) is future:
+      del self.__in_flight[key]
+    self.stats.in_flight = len(self.__in_flight)
+
+  async def do(self, key:str, fn:Callable[[], Awaitable]):
+    self.stats.calls += 1
+    future = self.__in_flight.get(key)
+    if future is None:
+      future = asyncio.ensure_future(fn())
+      self.__in_flight[key] = future
+      self.stats.in_flight = len(self.__in_flight)
+      future.add_done_callback(lambda future: self._forget(key, future))
+    else:
+      self.stats.deduplicated += 1
+    # a caller going away must not cancel the job the others wait on
+    return await asyncio.shield(future)
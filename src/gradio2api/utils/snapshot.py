@@ -0,0 +1,68 @@
+from pydantic import BaseModel
+from .hash import _make_hash
+import json
+import os
+
+def schema_hash(client_info_dict:dict)->str:
+  return _make_hash(json.dumps(client_info_dict, sort_keys=True, default=str))
+
+class Snapshot(BaseModel):
+  uri: str
+  schema_hash: str
+  client_info_dict: dict
+  client_docuemnt: str
+  config: dict
+
+# introspection results of upstream apps, one json file per uri
+class SnapshotStore:
+  directory: str
+  revalidate: bool
+
+  def __init__(self, directory:str, revalidate:bool = True):
+    self.directory = directory
+    # False when another process owns introspection, e.g. the master of --workers
+    self.revalidate = revalidate
+    os.makedirs(directory, exist_ok=True)
+
+  def _path(self, uri:str)->str:
+    return os.path.join(self.directory, f"{_make_hash(uri)}.json")
+
+  def load(self, uri:str)->Snapshot | None:
+    path = self._path(uri)
+    if not os.path.exists(path):
+      return None
+    try:
+      with open(path, "r") as f:
+        snapshot = Snapshot.model_validate_json(f.read())
+    except Exception as e:
+      print("[SKIP SNAPSHOT]", path, e)
+      return None
+    if snapshot.uri != uri:
+      return None
+    return snapshot
+
+  def save(
+      self,
+      uri:str,
+      client_info_dict:dict,
+      client_docuemnt:str,
+      config:dict,
+    )->Snapshot:
+    snapshot = Snapshot(
+      uri=uri,
+      schema_hash=schema_hash(client_info_dict),
+      client_info_dict=client_info_dict,
+      client_docuemnt=client_docuemnt,
+      config=config,
+    )
+    path = self._path(uri)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+      f.write(snapshot.model_dump_json())
+    os.replace(tmp_path, path)
+    return snapshot
+
+  def remove(self, uri:str):
+    path = self._path(uri)
+    if os.path.exists(path):
+      os.remove(path)
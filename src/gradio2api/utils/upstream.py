@@ -0,0 +1,79 @@
+from urllib.parse import urlsplit, urlunsplit
+from concurrent.futures import Future
+from typing import Any, Callable, TypeVar
+import threading
+import weakref
+import json
+
+T = TypeVar("T")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonical_uri(src:str)->str:
+  # "owner/space", "https://owner-space.hf.space/" and "HTTPS://Owner-Space.hf.space:443" are one upstream
+  src = src.strip()
+  if "://" not in src:
+    if src.count("/") == 1:
+      # the subdomain Hugging Face serves a space from
+      subdomain = src.replace("/", "-").replace("_", "-").replace(".", "-").lower()
+      return f"https://{subdomain}.hf.space"
+    return src
+
+  url = urlsplit(src)
+  scheme = url.scheme.lower()
+  netloc = (url.hostname or "").lower()
+  if url.port is not None and url.port != DEFAULT_PORTS.get(scheme):
+    netloc = f"{netloc}:{url.port}"
+  if url.username:
+    netloc = f"{url.username}{':' + url.password if url.password else ''}@{netloc}"
+  return urlunsplit((scheme, netloc, url.path.rstrip("/"), url.query, ""))
+
+def upstream_key(srcs:list[str], **options)->str:
+  # equal for prefixes that would build the same client
+  return json.dumps({"srcs": [canonical_uri(src) for src in srcs], **options}, sort_keys=True, default=repr)
+
+# one live object per canonical upstream, shared by every prefix that points to it
+class UpstreamRegistry:
+  def __init__(self):
+    self.__upstreams: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+    self.__building: dict[str, Future] = {}
+    self.__lock = threading.Lock()
+
+  def get(self, key:str, build:Callable[[], T])->T:
+    with self.__lock:
+      upstream = self.__upstreams.get(key)
+      if upstream is not None:
+        return upstream
+      future = self.__building.get(key)
+      owner = future is None
+      if owner:
+        future = self.__building[key] = Future()
+    if not owner:
+      # built concurrently by another prefix, wait for it
+      return future.result()
+
+    try:
+      upstream = build()
+    except BaseException as e:
+      with self.__lock:
+        self.__building.pop(key, None)
+      future.set_exception(e)
+      raise
+    with self.__lock:
+      self.__building.pop(key, None)
+      self.__upstreams[key] = upstream
+    future.set_result(upstream)
+    return upstream
+
+  def forget(self, uri:str):
+    # the next get introspects again, routers built before keep their upstream
+    uri = canonical_uri(uri)
+    with self.__lock:
+      for key in [key for key in self.__upstreams.keys() if uri in json.loads(key)["srcs"]]:
+        self.__upstreams.pop(key, None)
+
+  def __len__(self)->int:
+    return len(self.__upstreams)
+
+  def values(self)->list:
+    return list(self.__upstreams.values())
@@ -15,6 +15,9 @@ setup(
     "gradio",
     "retry",
   ],
+  extras_require={
+    "fast":["orjson", "msgpack", "zstandard"], # response encodings, see EncodingConfig
+  },
   entry_points={
     "console_scripts":[
       "gradio2api=gradio2api.cli:cli_remote"
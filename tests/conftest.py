@@ -0,0 +1,30 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+import asyncio
+import time
+
+@pytest.fixture(scope="session")
+def upstream_url():
+  # a real gradio upstream on localhost, served by the routers under test
+  import gradio as gr
+
+  def gen(x): # long enough to stay open across an admin refresh
+    for i in range(10):
+      time.sleep(0.2)
+      yield x * (i + 1)
+
+  with gr.Blocks() as demo:
+    text = gr.Textbox(label="x")
+    gr.Button().click(lambda x: x, text, gr.Textbox(label="y"), api_name="echo")
+    gr.Button().click(gen, text, gr.Textbox(label="y"), api_name="gen")
+    gr.Button().click(lambda im: f"{im.width}x{im.height}", gr.Image(type="pil", label="im"), gr.Textbox(label="y"), api_name="size")
+  # gradio takes its queue locks from the main thread's loop, an earlier asyncio.run leaves none
+  asyncio.set_event_loop(asyncio.new_event_loop())
+  demo.queue(default_concurrency_limit=None)
+  _, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+  yield url
+  demo.close()
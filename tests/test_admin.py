@@ -0,0 +1,145 @@
+from gradio2api.clients_aggregator import Aggregator
+from fastapi import FastAPI
+import asyncio
+import httpx
+
+TOKEN = "secret"
+
+def make_app(upstream_url:str, drain_timeout:float = 0.5)->tuple[FastAPI, Aggregator]:
+  aggregator = Aggregator(
+    [
+      {"uri": upstream_url, "prefix": "/a"},
+      {"uri": upstream_url, "prefix": "/b"},
+    ],
+    gui_mode="none",
+    admin_token=TOKEN,
+    drain_timeout=drain_timeout,
+  )
+  app = FastAPI()
+  app.include_router(aggregator)
+  return app, aggregator
+
+def client(app:FastAPI)->httpx.AsyncClient:
+  return httpx.AsyncClient(
+    transport=httpx.ASGITransport(app=app),
+    base_url="http://test",
+    timeout=None,
+    headers={"Authorization": f"Bearer {TOKEN}"},
+  )
+
+def test_admin_requires_the_token(upstream_url):
+  app, _ = make_app(upstream_url)
+  unguarded = FastAPI()
+  unguarded.include_router(Aggregator([], gui_mode="none"))
+
+  async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+      assert (await c.delete("/admin/apps", params={"prefix": "/b"})).status_code == 401
+      wrong = {"Authorization": "Bearer nope"}
+      assert (await c.post("/admin/apps", json={"uri": "http://169.254.169.254", "prefix": "/x"}, headers=wrong)).status_code == 401
+      assert (await c.post("/b/echo", json={"x": "hi"})).status_code == 200
+    transport = httpx.ASGITransport(app=unguarded)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+      assert (await c.delete("/admin/apps", params={"prefix": "/b"})).status_code == 404
+  asyncio.run(main())
+
+def test_delete_refresh_then_call(upstream_url):
+  app, _ = make_app(upstream_url)
+
+  async def main():
+    async with client(app) as c:
+      assert (await c.post("/b/echo", json={"x": "hi"})).status_code == 200
+
+      assert (await c.delete("/admin/apps", params={"prefix": "/b"})).status_code == 200
+      assert (await c.post("/b/echo", json={"x": "hi"})).status_code == 404
+      assert "/b/echo" not in (await c.get("/openapi.json")).json()["paths"]
+
+      assert (await c.post("/admin/apps/refresh", params={"prefix": "/a"})).status_code == 200
+      await asyncio.sleep(1.0) # the old routers are drained and shut down
+      response = await c.post("/a/echo", json={"x": "hi"})
+      assert response.status_code == 200
+      assert response.json() == {"y": "hi"}
+
+      added = await c.post("/admin/apps", json={"uri": upstream_url, "prefix": "/c"})
+      assert added.status_code == 200
+      assert (await c.post("/c/echo", json={"x": "new"})).json() == {"y": "new"}
+      assert "/c/echo" in (await c.get("/openapi.json")).json()["paths"]
+  asyncio.run(main())
+
+def test_prefixes_only_match_their_own_routes(upstream_url):
+  aggregator = Aggregator(
+    [
+      {"uri": upstream_url, "prefix": ""},
+      {"uri": upstream_url, "prefix": "/b"},
+      {"uri": upstream_url, "prefix": "/b/c"},
+    ],
+    gui_mode="none",
+    admin_token=TOKEN,
+  )
+  app = FastAPI()
+  app.include_router(aggregator)
+  @app.get("/health")
+  def health():
+    return "ok"
+
+  async def main():
+    async with client(app) as c:
+      for prefix in ("", "/b", "/b/c"):
+        assert (await c.post(f"{prefix}/echo", json={"x": prefix})).json() == {"y": prefix}
+      assert (await c.get("/health")).json() == "ok"
+      paths = (await c.get("/openapi.json")).json()["paths"]
+      assert {"/echo", "/b/echo", "/b/c/echo", "/health"} <= set(paths)
+
+      assert (await c.delete("/admin/apps", params={"prefix": "/b"})).status_code == 200
+      assert (await c.post("/b/echo", json={"x": "hi"})).status_code == 404
+      assert (await c.post("/b/c/echo", json={"x": "hi"})).status_code == 200
+      assert (await c.post("/echo", json={"x": "hi"})).status_code == 200
+      assert (await c.get("/health")).json() == "ok"
+      paths = (await c.get("/openapi.json")).json()["paths"]
+      assert "/b/echo" not in paths and "/b/c/echo" in paths
+  asyncio.run(main())
+
+async def open_stream(app:FastAPI, path:str, body:bytes)->tuple[asyncio.Task, asyncio.Queue]:
+  # httpx's ASGITransport buffers whole bodies, a stream is driven by hand
+  messages = asyncio.Queue()
+  received = False
+  async def receive():
+    nonlocal received
+    if not received:
+      received = True
+      return {"type": "http.request", "body": body, "more_body": False}
+    await asyncio.Event().wait() # the client never disconnects
+  scope = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+    "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+    "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+    "client": ("127.0.0.1", 1), "server": ("test", 80),
+  }
+  return asyncio.create_task(app(scope, receive, messages.put)), messages
+
+def test_drain_waits_for_open_streams(upstream_url):
+  app, aggregator = make_app(upstream_url, drain_timeout=10)
+
+  async def main():
+    async with client(app) as c:
+      old = aggregator.graido_app_routers["/a"][0]
+      task, messages = await open_stream(app, "/a/gen/stream", b'{"x": "g"}')
+      assert (await messages.get())["status"] == 200
+      assert b"data" in (await messages.get())["body"]
+      assert sum(metrics.in_flight for metrics in old.endpoint_metrics) == 1
+
+      assert (await c.post("/admin/apps/refresh", params={"prefix": "/a"})).status_code == 200
+      await asyncio.sleep(0.2)
+      assert not task.done()
+      assert not old.gradio_application.executor._shutdown # the stream still uses it
+      await task
+      body = b""
+      while not messages.empty():
+        body += (await messages.get()).get("body", b"")
+      assert b"event: error" not in body
+      assert b"event: end" in body
+      assert sum(metrics.in_flight for metrics in old.endpoint_metrics) == 0
+      await asyncio.sleep(0.3)
+      assert old.gradio_application.executor._shutdown
+  asyncio.run(main())
@@ -0,0 +1,120 @@
+from gradio2api.admission import AdmissionConfig, AdmissionScheduler, AdmissionRejected
+from gradio2api.clients_aggregator import Aggregator
+from fastapi import FastAPI
+import asyncio
+import httpx
+import pytest
+
+async def admitted_order(scheduler:AdmissionScheduler, calls:list[tuple[str, str]])->list[str]:
+  # one call holds the only slot while the others queue, then they run one by one
+  order = []
+  blocker = scheduler.register("/blocker")
+  release = asyncio.Event()
+  async def _hold():
+    async with blocker.slot("/echo"):
+      await release.wait()
+  async def _call(prefix:str, api_name:str):
+    async with scheduler.prefixes[prefix].slot(api_name):
+      order.append(f"{prefix}{api_name}")
+      await asyncio.sleep(0)
+
+  holder = asyncio.create_task(_hold())
+  await asyncio.sleep(0)
+  tasks = []
+  for prefix, api_name in calls:
+    tasks.append(asyncio.create_task(_call(prefix, api_name)))
+    await asyncio.sleep(0) # queued in this order
+  release.set()
+  await asyncio.gather(holder, *tasks)
+  return order
+
+def test_priority_between_prefixes():
+  async def main():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    scheduler.register("/low", AdmissionConfig(priority=0))
+    scheduler.register("/high", AdmissionConfig(priority=1))
+    return await admitted_order(scheduler, [("/low", "/a"), ("/low", "/b"), ("/high", "/a"), ("/high", "/b")])
+  assert asyncio.run(main()) == ["/high/a", "/high/b", "/low/a", "/low/b"]
+
+def test_endpoint_priority_inside_a_prefix():
+  async def main():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    scheduler.register("/app", AdmissionConfig(endpoint_priority={"/urgent": 1}))
+    return await admitted_order(scheduler, [("/app", "/a"), ("/app", "/b"), ("/app", "/urgent")])
+  assert asyncio.run(main()) == ["/app/urgent", "/app/a", "/app/b"]
+
+def test_weights_share_slots_within_a_priority():
+  async def main():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    scheduler.register("/heavy", AdmissionConfig(weight=2))
+    scheduler.register("/light", AdmissionConfig(weight=1))
+    calls = [("/light", "/x")] * 6 + [("/heavy", "/x")] * 6
+    return await admitted_order(scheduler, calls)
+  order = asyncio.run(main())
+  # two heavy calls for each light one while both are backlogged
+  assert order[:6].count("/heavy/x") == 4
+  assert order[:6].count("/light/x") == 2
+
+def test_endpoint_cap_does_not_block_other_endpoints():
+  async def main():
+    scheduler = AdmissionScheduler()
+    admission = scheduler.register("/app", AdmissionConfig(endpoint_max_concurrency={"/slow": 1}))
+    async with admission.slot("/slow"):
+      queued = asyncio.create_task(admission.slot("/slow").__aenter__())
+      await asyncio.sleep(0)
+      assert admission.stats.queued == 1
+      async with admission.slot("/fast"):
+        assert admission.stats.in_flight == 2
+    await queued
+    assert admission.stats.in_flight == 1
+  asyncio.run(main())
+
+def test_full_queue_and_queue_timeout_reject():
+  async def main():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    admission = scheduler.register("/app", AdmissionConfig(max_queue=1, queue_timeout=0.1))
+    async with admission.slot("/a"):
+      waiting = asyncio.create_task(admission.slot("/a").__aenter__())
+      await asyncio.sleep(0)
+      with pytest.raises(AdmissionRejected) as full:
+        await admission.slot("/a").__aenter__()
+      assert full.value.retry_after >= 1
+      with pytest.raises(AdmissionRejected):
+        await waiting
+    assert admission.stats.rejected == 2
+    assert admission.stats.queued == 0
+    assert scheduler.in_flight == 0
+  asyncio.run(main())
+
+def test_unregister_turns_waiting_calls_away():
+  async def main():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    admission = scheduler.register("/app")
+    async with admission.slot("/a"):
+      waiting = asyncio.create_task(admission.slot("/a").__aenter__())
+      await asyncio.sleep(0)
+      scheduler.unregister("/app")
+      with pytest.raises(AdmissionRejected):
+        await waiting
+  asyncio.run(main())
+
+def test_rejected_call_is_a_429_with_retry_after(upstream_url):
+  aggregator = Aggregator(
+    [{"uri": upstream_url, "prefix": "/a", "admission": {"max_concurrency": 1, "max_queue": 0}}],
+    gui_mode="none",
+  )
+  app = FastAPI()
+  app.include_router(aggregator)
+
+  async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as c:
+      job = (await c.post("/a/gen/jobs", json={"x": "a"})).json() # holds the only slot
+      await asyncio.sleep(0.2)
+      response = await c.post("/a/echo", json={"x": "hi"})
+      assert response.status_code == 429
+      assert int(response.headers["retry-after"]) >= 1
+      while (await c.get(f"/a/jobs/{job['job_id']}")).json()["state"] in ("pending", "running"):
+        await asyncio.sleep(0.1)
+      assert (await c.post("/a/echo", json={"x": "hi"})).json() == {"y": "hi"}
+  asyncio.run(main())
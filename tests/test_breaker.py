@@ -0,0 +1,83 @@
+from gradio2api.breaker import BreakerConfig, CircuitBreaker, CircuitOpen
+from gradio2api.batching import MicroBatcher
+from gradio2api.gr_application import RemoteGradioApplication
+from gradio2api.utils.upstream import UpstreamRegistry
+from gradio_client.exceptions import AppError
+from concurrent.futures import Future
+import asyncio
+import pytest
+import time
+
+def fail(breaker:CircuitBreaker, exc:Exception | None = None):
+  exc = exc or ConnectionError("upstream is down")
+  with pytest.raises(type(exc)):
+    with breaker.guard("/echo"):
+      raise exc
+
+def test_opens_after_consecutive_failures():
+  breaker = CircuitBreaker(BreakerConfig(failure_threshold=3, reset_timeout=60))
+  fail(breaker)
+  fail(breaker)
+  assert breaker.state == "closed"
+  fail(breaker)
+  assert breaker.state == "open"
+
+  with pytest.raises(CircuitOpen) as rejected:
+    breaker.check()
+  assert 0 < rejected.value.retry_after <= 60
+  assert breaker.status().rejected == 1
+
+def test_app_errors_keep_the_circuit_closed():
+  breaker = CircuitBreaker(BreakerConfig(failure_threshold=1))
+  fail(breaker, AppError("the function raised"))
+  assert breaker.state == "closed"
+
+def test_half_open_probe_closes_on_success():
+  breaker = CircuitBreaker(BreakerConfig(failure_threshold=1, reset_timeout=0.05, half_open_max_calls=1))
+  fail(breaker)
+  assert breaker.state == "open"
+  time.sleep(0.1)
+
+  with breaker.guard("/echo"):
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen): # one probe at a time
+      breaker.before_call()
+  assert breaker.state == "closed"
+  assert breaker.consecutive_failures == 0
+
+def test_half_open_probe_failure_reopens():
+  breaker = CircuitBreaker(BreakerConfig(failure_threshold=1, reset_timeout=0.05))
+  fail(breaker)
+  opened_at = breaker.opened_at
+  time.sleep(0.1)
+  fail(breaker)
+  assert breaker.state == "open"
+  assert breaker.opened_at > opened_at
+
+def test_timeout_follows_the_latency_percentile():
+  breaker = CircuitBreaker(BreakerConfig(min_samples=5, timeout_multiplier=2, min_timeout=0.1, max_timeout=10))
+  assert breaker.timeout_for("/echo") == 10 # not enough samples yet
+  for latency in [0.1, 0.2, 0.3, 0.4, 0.5]:
+    breaker.record("/echo", latency)
+  assert breaker.timeout_for("/echo") == pytest.approx(1.0)
+
+def test_batched_timeout_cancels_the_upstream_job():
+  jobs = []
+  def submit(item:dict)->Future:
+    jobs.append(Future()) # never finishes
+    return jobs[-1]
+
+  async def main():
+    batcher = MicroBatcher(submit, max_batch_size=1, max_wait=0)
+    with pytest.raises(asyncio.TimeoutError):
+      await asyncio.wait_for(batcher.submit({"x": "hi"}), 0.2)
+    await asyncio.sleep(0.05)
+  asyncio.run(main())
+  assert jobs[0].cancelled()
+
+def test_prefixes_of_one_upstream_share_the_breaker(upstream_url):
+  upstreams = UpstreamRegistry()
+  a = RemoteGradioApplication(upstream_url, breaker=BreakerConfig(), upstreams=upstreams)
+  b = RemoteGradioApplication(upstream_url.rstrip("/"), breaker=BreakerConfig(), upstreams=upstreams)
+  assert a.breaker is b.breaker
+  assert a.apis["/echo"].breaker is b.apis["/echo"].breaker is a.breaker
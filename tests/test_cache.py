@@ -0,0 +1,92 @@
+from gradio2api.cache import ResultCache, CacheConfig, MISS
+from gradio2api.output_store import OutputStore, OutputStoreConfig
+from gradio2api.utils.hash import make_input_key, has_file_data
+import asyncio
+import os
+import time
+
+def test_lru_eviction():
+  cache = ResultCache(CacheConfig(max_entries=2), namespace="test")
+  cache.set("a", 1)
+  cache.set("b", 2)
+  assert cache.get("a") == 1 # a is now the most recent
+  cache.set("c", 3)
+  assert cache.get("b") is MISS
+  assert cache.get("a") == 1
+  assert cache.get("c") == 3
+  assert cache.stats.entries == 2
+  assert (cache.stats.hits, cache.stats.misses) == (3, 1)
+
+def test_ttl_expiry():
+  cache = ResultCache(CacheConfig(ttl=0.05), namespace="test")
+  cache.set("a", 1)
+  assert cache.get("a") == 1
+  time.sleep(0.1)
+  assert cache.get("a") is MISS
+  assert cache.stats.entries == 0
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+  config = CacheConfig(max_entries=1, disk_dir=str(tmp_path))
+  cache = ResultCache(config, namespace="http://upstream/echo")
+  cache.set("a", ["x"])
+  cache.set("b", ["y"]) # a leaves memory, stays on disk
+  assert cache.get("a") == ["x"]
+  assert cache.stats.disk_hits == 1
+
+  restarted = ResultCache(config, namespace="http://upstream/echo")
+  assert restarted.get("b") == ["y"]
+  assert ResultCache(config, namespace="http://other/echo").get("b") is MISS
+
+def test_expired_disk_entry_is_removed(tmp_path):
+  cache = ResultCache(CacheConfig(ttl=0.05, disk_dir=str(tmp_path)), namespace="test")
+  cache.set("a", 1)
+  time.sleep(0.1)
+  assert ResultCache(cache.config, namespace="test").get("a") is MISS
+  assert os.listdir(cache.disk_dir) == []
+
+def test_evicted_output_files_invalidate_the_entry(tmp_path):
+  store = OutputStore(OutputStoreConfig(root=str(tmp_path), sweep_interval=3600))
+  path = os.path.join(store.download_dir("http://upstream"), "out.png")
+  with open(path, "wb") as f:
+    f.write(b"png")
+  cache = ResultCache(CacheConfig(), namespace="test", output_store=store)
+  cache.set("a", [{"path": path}, "caption"])
+  assert cache.get("a") == [{"path": path}, "caption"]
+
+  os.remove(path)
+  assert cache.get("a") is MISS
+  assert cache.stats.entries == 0
+
+def test_for_api_honours_api_names():
+  config = CacheConfig(api_names=["/echo"])
+  assert ResultCache.for_api(config, "http://upstream", "/echo") is not None
+  assert ResultCache.for_api(config, "http://upstream", "/gen") is None
+  assert ResultCache.for_api(None, "http://upstream", "/echo") is None
+
+def test_input_key_ignores_dict_order():
+  assert make_input_key("/echo", {"a": 1, "b": [1, 2]}) == make_input_key("/echo", {"b": [1, 2], "a": 1})
+  assert make_input_key("/echo", {"a": 1}) != make_input_key("/other", {"a": 1})
+
+def test_async_disk_tier(tmp_path):
+  async def main():
+    config = CacheConfig(max_entries=1, disk_dir=str(tmp_path))
+    cache = ResultCache(config, namespace="test")
+    await cache.aset("a", ["x"])
+    await cache.aset("b", ["y"])
+    assert await cache.aget("a") == ["x"]
+    assert await cache.aget("missing") is MISS
+    assert (cache.stats.disk_hits, cache.stats.misses) == (1, 1)
+    assert await ResultCache(config, namespace="test").aget("b") == ["y"]
+  asyncio.run(main())
+
+def test_input_files_are_keyed_by_content(tmp_path):
+  def file_data(path):
+    return {"path": str(path), "meta": {"_type": "gradio.FileData"}}
+  first, second = tmp_path / "first.png", tmp_path / "second.png"
+  first.write_bytes(b"same")
+  second.write_bytes(b"same")
+  item = {"image": file_data(first), "caption": "c"}
+  assert has_file_data(item) and not has_file_data({"caption": "c"})
+  assert make_input_key("/echo", item) == make_input_key("/echo", {"image": file_data(second), "caption": "c"})
+  second.write_bytes(b"other")
+  assert make_input_key("/echo", item) != make_input_key("/echo", {"image": file_data(second), "caption": "c"})
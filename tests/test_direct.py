@@ -0,0 +1,26 @@
+from gradio2api.direct import DirectClient
+import os
+
+def test_file_outputs_are_stored_by_content(tmp_path):
+  import gradio as gr
+  source = tmp_path / "source"
+  source.mkdir()
+  def write(text):
+    path = source / f"{text}.txt"
+    path.write_text(text)
+    return str(path)
+
+  with gr.Blocks() as demo:
+    gr.Button().click(write, gr.Textbox(label="text"), gr.File(label="out"), api_name="write")
+
+  downloads = tmp_path / "downloads"
+  client = DirectClient(demo, download_files=str(downloads))
+  first = client.predict("a", api_name="/write")
+  again = client.predict("a", api_name="/write")
+  assert first == again
+  assert first.startswith(str(downloads))
+  assert open(first).read() == "a"
+
+  other = client.predict("b", api_name="/write")
+  assert os.path.dirname(other) != os.path.dirname(first)
+  assert len(os.listdir(downloads)) == 2
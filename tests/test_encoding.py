@@ -0,0 +1,77 @@
+from gradio2api import encoding
+from gradio2api.encoding import (
+  EncodingConfig, JSON, MSGPACK,
+  parse_accept, negotiate_media_type, negotiate_compression, encode_response,
+)
+from starlette.requests import Request
+import gzip
+import json
+import pytest
+
+def make_request(**headers)->Request:
+  return Request({
+    "type": "http",
+    "method": "POST",
+    "path": "/",
+    "headers": [(key.replace("_", "-").encode(), value.encode()) for key, value in headers.items()],
+  })
+
+def test_parse_accept():
+  assert parse_accept(None) == {}
+  assert parse_accept("application/json") == {"application/json": 1.0}
+  assert parse_accept("Application/MsgPack;q=0.9, application/json ; q=0.5, */*;q=0") == {
+    "application/msgpack": 0.9,
+    "application/json": 0.5,
+    "*/*": 0.0,
+  }
+  assert parse_accept("gzip;q=oops, , zstd") == {"gzip": 0.0, "zstd": 1.0}
+
+@pytest.mark.parametrize("accept, expected", [
+  (None, JSON),
+  ("*/*", JSON),
+  ("application/msgpack", MSGPACK),
+  ("application/x-msgpack, application/json;q=0.5", MSGPACK),
+  ("application/json, application/msgpack;q=0.5", JSON),
+  ("application/json, application/vnd.msgpack", MSGPACK), # a tie prefers msgpack
+  ("application/msgpack;q=0", JSON),
+])
+def test_negotiate_media_type(accept, expected):
+  pytest.importorskip("msgpack")
+  assert negotiate_media_type(accept, EncodingConfig()) == expected
+
+def test_msgpack_can_be_turned_off():
+  assert negotiate_media_type("application/msgpack", EncodingConfig(msgpack=False)) == JSON
+
+def test_negotiate_compression(monkeypatch):
+  monkeypatch.setattr(encoding, "zstandard", None) # zstd is skipped when it is not installed
+  config = EncodingConfig()
+  assert negotiate_compression(None, config) is None
+  assert negotiate_compression("gzip, zstd", config) == "gzip"
+  assert negotiate_compression("*", config) == "gzip"
+  assert negotiate_compression("*, gzip;q=0", config) is None
+  assert negotiate_compression("br", config) is None
+
+def test_negotiate_zstd_first():
+  pytest.importorskip("zstandard")
+  assert negotiate_compression("gzip, zstd", EncodingConfig()) == "zstd"
+  assert negotiate_compression("gzip, zstd", EncodingConfig(compression=["gzip", "zstd"])) == "gzip"
+
+def test_encode_response(monkeypatch):
+  monkeypatch.setattr(encoding, "zstandard", None)
+  content = {"y": "x" * 2048}
+  config = EncodingConfig(compress_min_bytes=1024)
+
+  response = encode_response(content, make_request(accept_encoding="gzip"), config)
+  assert response.headers["content-encoding"] == "gzip"
+  assert response.headers["vary"] == "Accept, Accept-Encoding"
+  assert json.loads(gzip.decompress(response.body)) == content
+
+  small = encode_response({"y": "x"}, make_request(accept_encoding="gzip"), config)
+  assert "content-encoding" not in small.headers
+  assert json.loads(small.body) == {"y": "x"}
+
+def test_encode_msgpack_response():
+  msgpack = pytest.importorskip("msgpack")
+  response = encode_response({"y": [1, 2]}, make_request(accept="application/msgpack"), EncodingConfig())
+  assert response.media_type == MSGPACK
+  assert msgpack.unpackb(response.body) == {"y": [1, 2]}
@@ -0,0 +1,33 @@
+from gradio2api.clients_aggregator import Aggregator
+from fastapi import FastAPI
+import asyncio
+import httpx
+
+def test_jobs_hold_an_admission_slot(upstream_url):
+  aggregator = Aggregator(
+    [{"uri": upstream_url, "prefix": "/a", "admission": {"max_concurrency": 1}}],
+    gui_mode="none",
+  )
+  app = FastAPI()
+  app.include_router(aggregator)
+  admission = aggregator.scheduler.prefixes["/a"]
+
+  async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as c:
+      first = (await c.post("/a/gen/jobs", json={"x": "a"})).json()
+      second = (await c.post("/a/gen/jobs", json={"x": "b"})).json()
+      await asyncio.sleep(0.5)
+      assert admission.stats.in_flight == 1
+      assert admission.stats.queued == 1
+      assert (await c.get(f"/a/jobs/{second['job_id']}")).json()["state"] == "pending"
+
+      for job in (first, second):
+        while (status := (await c.get(f"/a/jobs/{job['job_id']}")).json())["state"] in ("pending", "running"):
+          await asyncio.sleep(0.1)
+        assert status["state"] == "finished"
+      assert admission.stats.in_flight == 0
+      assert admission.stats.admitted == 2
+      result = (await c.get(f"/a/jobs/{second['job_id']}/result")).json()
+      assert result == {"y": "b" * 10}
+  asyncio.run(main())
@@ -0,0 +1,58 @@
+from gradio2api.gr_application import EndpointSchema, MultipleFields
+from gradio2api.utils.upstream import canonical_uri, upstream_key
+from types import MappingProxyType
+import pytest
+
+CONFIG = {
+  "parameters": [
+    {
+      "label": "text",
+      "parameter_name": "text",
+      "parameter_has_default": False,
+      "parameter_default": None,
+      "type": {"type": "string"},
+      "python_type": {"type": "str", "description": ""},
+      "component": "Textbox",
+      "example_input": "Hello!!",
+    },
+  ],
+  "returns": [
+    {
+      "label": "out",
+      "type": {"type": "string"},
+      "python_type": {"type": "str", "description": ""},
+      "component": "Textbox",
+    },
+  ],
+}
+
+def test_interned_schema_builds_models():
+  schema = EndpointSchema.intern("/models_echo", CONFIG)
+  assert EndpointSchema.intern("/models_echo", CONFIG) is schema
+  assert isinstance(schema.parameters[0], MappingProxyType)
+
+  assert schema.parameter_model(text="hi").text == "hi"
+  assert list(schema.return_model.model_fields) == list(schema.return_names)
+  assert schema.to_dict() == CONFIG
+
+  # read-only fields are accepted anywhere a field dict is
+  model = MultipleFields(schema.parameters).to_pydantic_model("models_echo_parameter")
+  assert model.model_json_schema()["properties"] == schema.parameter_model.model_json_schema()["properties"]
+
+@pytest.mark.parametrize("src, expected", [
+  ("owner/space", "https://owner-space.hf.space"),
+  ("Owner/My_Space", "https://owner-my-space.hf.space"),
+  ("https://owner-space.hf.space/", "https://owner-space.hf.space"),
+  ("HTTPS://Owner-Space.hf.space:443", "https://owner-space.hf.space"),
+  ("http://127.0.0.1:80/", "http://127.0.0.1"),
+  ("http://127.0.0.1:7860/app/", "http://127.0.0.1:7860/app"),
+  ("http://user:pw@Host:8080/?a=1#frag", "http://user:pw@host:8080?a=1"),
+  ("  http://localhost:7860  ", "http://localhost:7860"),
+])
+def test_canonical_uri(src, expected):
+  assert canonical_uri(src) == expected
+
+def test_upstream_key():
+  assert upstream_key(["owner/space"], hf_token=None) == upstream_key(["https://owner-space.hf.space/"], hf_token=None)
+  assert upstream_key(["owner/space"], hf_token=None) != upstream_key(["owner/space"], hf_token="t")
+  assert upstream_key(["a/b", "c/d"]) != upstream_key(["c/d", "a/b"])
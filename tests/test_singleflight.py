@@ -0,0 +1,66 @@
+from gradio2api.utils.singleflight import SingleFlight
+import asyncio
+import pytest
+
+def test_concurrent_calls_share_one_execution():
+  async def main():
+    single_flight = SingleFlight()
+    calls = 0
+    async def fetch():
+      nonlocal calls
+      calls += 1
+      await asyncio.sleep(0.05)
+      return calls
+
+    results = await asyncio.gather(*[single_flight.do("k", fetch) for _ in range(5)])
+    assert results == [1] * 5
+    assert calls == 1
+    assert single_flight.stats.deduplicated == 4
+    assert single_flight.stats.in_flight == 0
+
+    # nothing is remembered once the call is done
+    assert await single_flight.do("k", fetch) == 2
+  asyncio.run(main())
+
+def test_different_keys_run_separately():
+  async def main():
+    single_flight = SingleFlight()
+    async def fetch(value):
+      await asyncio.sleep(0.01)
+      return value
+    results = await asyncio.gather(
+      single_flight.do("a", lambda: fetch("a")),
+      single_flight.do("b", lambda: fetch("b")),
+    )
+    assert results == ["a", "b"]
+    assert single_flight.stats.deduplicated == 0
+  asyncio.run(main())
+
+def test_errors_reach_every_waiter():
+  async def main():
+    single_flight = SingleFlight()
+    async def fetch():
+      await asyncio.sleep(0.01)
+      raise ConnectionError("upstream is down")
+    results = await asyncio.gather(
+      *[single_flight.do("k", fetch) for _ in range(3)],
+      return_exceptions=True,
+    )
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert single_flight.stats.in_flight == 0
+  asyncio.run(main())
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+  async def main():
+    single_flight = SingleFlight()
+    async def fetch():
+      await asyncio.sleep(0.05)
+      return "done"
+    first = asyncio.create_task(single_flight.do("k", fetch))
+    second = asyncio.create_task(single_flight.do("k", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+      await first
+    assert await second == "done"
+  asyncio.run(main())
@@ -0,0 +1,41 @@
+from gradio2api.gr_application import Upstream, PendingClient, save_snapshot
+from gradio2api.utils.snapshot import SnapshotStore
+import time
+
+class FlakyUpstream(Upstream):
+  reconnect_delay = 0.05
+  failures = 2
+
+  def _connect(self):
+    if self.failures:
+      self.failures -= 1
+      raise ConnectionError("upstream is down")
+    return super()._connect()
+
+def test_reconnects_after_a_failed_background_connect(upstream_url, tmp_path):
+  store = SnapshotStore(str(tmp_path))
+  save_snapshot(upstream_url, store)
+  upstream = FlakyUpstream([upstream_url], snapshot_store=store)
+  assert upstream.from_snapshot
+  pending = upstream.lazy_client
+  assert isinstance(pending, PendingClient)
+
+  errors = []
+  deadline = time.time() + 30
+  while True:
+    try:
+      client = pending.result()
+      break
+    except ConnectionError as e:
+      errors.append(e)
+      assert upstream.connection_error == "ConnectionError: upstream is down"
+      assert time.time() < deadline
+      time.sleep(0.01)
+
+  assert errors # calls failed fast while the upstream was down
+  assert upstream.failures == 0
+  assert upstream.connection_error is None
+  assert upstream.client is client
+  assert upstream.lazy_client is client
+  assert client.predict("hi", api_name="/echo") == "hi"
+  assert upstream.schema_drift is False
@@ -0,0 +1,33 @@
+import subprocess
+import json
+import sys
+import os
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+GUI_MODULES = ["gradio", "pandas", "numpy", "PIL"]
+BUDGET_S = 3.0 # bench_startup.py holds 2s, a cold CI runner gets some headroom
+
+PROBE = f"""
+import time, sys, json
+start = time.perf_counter()
+import gradio2api
+seconds = time.perf_counter() - start
+print(json.dumps({{
+  "seconds": seconds,
+  "gui_modules": [m for m in {GUI_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+def test_import_skips_the_gui_stack():
+  # a fresh interpreter, nothing is cached in sys.modules
+  env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")]))}
+  output = subprocess.run(
+    [sys.executable, "-c", PROBE],
+    check=True,
+    capture_output=True,
+    text=True,
+    env=env,
+  ).stdout
+  report = json.loads(output.strip().splitlines()[-1])
+  assert report["gui_modules"] == []
+  assert report["seconds"] < BUDGET_S
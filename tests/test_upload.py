@@ -0,0 +1,33 @@
+from gradio2api.clients_aggregator import Aggregator
+from fastapi import FastAPI
+import asyncio
+import httpx
+import json
+import io
+
+def png(width:int, height:int)->bytes:
+  from PIL import Image
+  buffer = io.BytesIO()
+  Image.new("RGB", (width, height)).save(buffer, format="PNG")
+  return buffer.getvalue()
+
+def test_upload_only_for_file_parameters(upstream_url):
+  aggregator = Aggregator([{"uri": upstream_url, "prefix": "/a"}], gui_mode="none")
+  app = FastAPI()
+  app.include_router(aggregator)
+
+  async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as c:
+      paths = (await c.get("/openapi.json")).json()["paths"]
+      assert "/a/size/upload" in paths
+      assert "/a/echo/upload" not in paths and "/a/gen/upload" not in paths
+
+      response = await c.post(
+        "/a/size/upload",
+        data={"item": json.dumps({"im": {"upload": "picture"}})},
+        files={"picture": ("picture.png", png(3, 2), "image/png")},
+      )
+      assert response.status_code == 200
+      assert response.json() == {"y": "3x2"}
+  asyncio.run(main())